@@ -15,7 +15,8 @@
 
 module sin_table #(
            parameter PW = 17, // Number of bits in the input phase
-           parameter OW = 13  // Number of output bits
+           parameter OW = 13, // Number of output bits
+           parameter TABLE = "sintable.hex" // look-up table file ($readmemh)
        ) (
            input  wire            i_clk  ,
            input  wire            i_reset,
@@ -34,7 +35,7 @@ module sin_table #(
 
 reg [(OW-1):0] tbl[0:((1<<PW)-1)]; // infer BRAM, 2^PW elements of OW width
 
-initial	$readmemh("sintable.hex", tbl); // init BRAM
+initial	$readmemh(TABLE, tbl); // init BRAM
 
 initial o_val = 1;
 always @(posedge i_clk)
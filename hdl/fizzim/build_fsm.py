@@ -0,0 +1,175 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Incremental, parallel regeneration of all the fizzim state machines
+
+Batch version of ``fizzim.sh`` for every ``.fzm`` file of this directory (or
+the ones given on the command line). For each state machine ``<name>.fzm``:
+
+1. the user code of the generated ``<out>/<name>.v`` is saved into the file
+   named by the ``include_at_top_of_file2`` attribute of the ``.fzm`` (see
+   ``formal.py``), so code edited in the ``.v`` is merged back,
+2. ``perl fizzim.pl`` regenerates ``<out>/<name>.v``, but only if the ``.fzm``,
+   the header (``include_at_top_of_file``), the user code, ``fizzim.pl`` or the
+   ``.v`` itself changed since the last build (``STAMPS``).
+
+Independent state machines run in parallel; the ones sharing a user code file
+(e.g., the default ``usercode.tmp``) run one after the other. As in
+``fizzim.sh``, fizzim runs in this directory and the ``.v`` files go to ``..``::
+
+    python build_fsm.py                  # all the .fzm files
+    python build_fsm.py int_clk_div.fzm -j 8 --force
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import formal
+
+FIZZIM_DIR = os.path.dirname(os.path.realpath(__file__))
+FIZZIM = os.path.join(FIZZIM_DIR, "fizzim.pl")
+STAMPS = ".fizzim_build.json"  # hashes of the inputs and output of every build
+
+
+def attribute(fzm, name):
+    """
+    Value of the machine attribute ``name`` of the ``.fzm`` file (None if not set)
+    """
+    with open(fzm, errors="replace") as f:
+        match = re.search(r"<%s>.*?<value>\s*\n\s*([^<\s][^\n]*?)\s*\n" % name, f.read(), re.S)
+    return match.group(1) if match else None
+
+
+def _sha256(path):
+    if path is None or not os.path.exists(path):
+        return ""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class FSM(object):
+    """
+    One state machine: its ``.fzm`` and the files it reads and writes
+
+    :param fzm: fizzim file
+    :param out_dir: directory of the generated verilog file
+    """
+    def __init__(self, fzm, out_dir):
+        self.fzm = os.path.realpath(fzm)
+        self.name = os.path.splitext(os.path.basename(fzm))[0]
+        self.verilog = os.path.realpath(os.path.join(out_dir, self.name + ".v"))
+        # paths in the .fzm are relative to the directory fizzim runs in
+        self.header, self.usercode = [
+            os.path.realpath(os.path.join(FIZZIM_DIR, path)) if path else None
+            for path in (attribute(fzm, "include_at_top_of_file"),
+                         attribute(fzm, "include_at_top_of_file2"))]
+
+    def inputs(self):
+        """
+        Hash of everything the generated file depends on
+        """
+        h = hashlib.sha256()
+        for path in (self.fzm, self.header, self.usercode, FIZZIM):
+            h.update(_sha256(path).encode())
+        return h.hexdigest()
+
+
+def build(fsm, stamps, cache, force=False):
+    """
+    Save the user code of ``fsm`` and regenerate it if anything changed
+
+    :param fsm: :class:`FSM`
+    :param stamps: previous builds (updated)
+    :param cache: ``formal.py`` cache (updated)
+    :param force: regenerate even if nothing changed
+    :return: (name, status, seconds)
+    """
+    start = time.time()
+    if fsm.usercode and os.path.exists(fsm.verilog):
+        formal.backup(fsm.verilog, fsm.usercode, cache)
+
+    inputs = fsm.inputs()
+    stamp = stamps.get(fsm.verilog)
+    if not force and stamp == [inputs, _sha256(fsm.verilog)]:
+        return fsm.name, "up to date", time.time() - start
+
+    part = fsm.verilog + ".part"
+    with open(fsm.fzm) as fin, open(part, "w") as fout:
+        ret = subprocess.call(["perl", "-f", FIZZIM], stdin=fin, stdout=fout, cwd=FIZZIM_DIR)
+    if ret:
+        os.remove(part)
+        return fsm.name, "FAILED (fizzim.pl returned %d)" % ret, time.time() - start
+    os.replace(part, fsm.verilog)
+    stamps[fsm.verilog] = [inputs, _sha256(fsm.verilog)]
+    return fsm.name, "generated", time.time() - start
+
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(path, data):
+    with open(path + ".part", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".part", path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("fzm", nargs="*",
+                        help="fizzim files (default: all the .fzm files next to this script)")
+    parser.add_argument("-o", "--out", default=os.path.join(FIZZIM_DIR, ".."),
+                        help="directory of the generated verilog files (default: ..)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of state machines generated at the same time")
+    parser.add_argument("-f", "--force", action="store_true",
+                        help="regenerate even if nothing changed")
+    args = parser.parse_args(argv)
+
+    fsms = [FSM(fzm, args.out)
+            for fzm in args.fzm or sorted(glob.glob(os.path.join(FIZZIM_DIR, "*.fzm")))]
+
+    # state machines sharing a user code file must not run at the same time
+    groups = {}
+    for fsm in fsms:
+        groups.setdefault(fsm.usercode or fsm.verilog, []).append(fsm)
+
+    stamps_file = os.path.join(FIZZIM_DIR, STAMPS)
+    cache_file = os.path.join(FIZZIM_DIR, formal.CACHE)
+    stamps, cache = _load(stamps_file), _load(cache_file)
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        results = pool.map(lambda group: [build(fsm, stamps, cache, args.force) for fsm in group],
+                           groups.values())
+        results = [r for group in results for r in group]
+    _save(stamps_file, stamps)
+    _save(cache_file, cache)
+
+    for name, status, seconds in results:
+        print("%-32s %-36s %8.3f s" % (name, status, seconds))
+    n_failed = sum(status.startswith("FAILED") for _, status, _ in results)
+    print("%d state machines, %d generated, %d failed in %.2f s"
+          % (len(results), sum(status == "generated" for _, status, _ in results),
+             n_failed, time.time() - start))
+    return 1 if n_failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
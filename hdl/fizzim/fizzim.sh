@@ -1,6 +1,6 @@
 #!/bin/sh
 
-FSM_name='int_clk_div'
+FSM_name=${1:-int_clk_div} # all FSMs, incrementally: python build_fsm.py
 
 # usercode backup
 python formal.py ../${FSM_name}.v
@@ -3,39 +3,123 @@
 # License: MIT License
 """
 Module for incremental code generation using fizzim
+
+Before fizzim regenerates an FSM, the hand written code after
+``// fizzim code generation ends`` has to be saved so that fizzim can put it
+back (``include_at_top_of_file2`` attribute of the ``.fzm``). In one pass
+over the generated file this writes
+
+* the backup ``<FSM>bak`` (a copy of the whole file), and
+* the user code, i.e., everything after the marker without the 6 banner lines
+  following it and without the last line (``endmodule``).
+
+Only one line is held in memory at a time. Files whose contents did not change
+since the last run (see ``CACHE``) are skipped::
+
+    python formal.py ../int_clk_div.v                  # user code in usercode.tmp
+    python formal.py ../int_clk_div.v usercode2        # user code in usercode2.tmp
+    python formal.py a.v:usercode_a b.v:usercode_b     # several FSMs
 """
 
+import hashlib
+import json
 import os
-import re
 import sys
 
-FSM = sys.argv[1]
-FSM_bak = FSM+"bak"
-if len(sys.argv) > 2:
-    USERCODE = sys.argv[2]+'.tmp'
-else:
-    USERCODE = 'usercode.tmp'
-
-regex = re.compile(r"// verilator lint_on CASEINCOMPLETE")
-line_found = False
-
-with open(FSM) as file1:
-    with open(FSM_bak, "w+") as file2:
-            for line in file1:
-                file2.write(line)
-
-with open(FSM) as file1:
-    for line in file1:
-        if re.match("\/\/ fizzim code generation ends", line):
-            line_found = True
-            break
-    with open(USERCODE, "w+") as file2:
-        if line_found:
-            for line in file1:
-                file2.write(line)
-
-# delete the first and last lines
-with open(USERCODE, 'r') as fin:
-    data = fin.read().splitlines(True)
-with open(USERCODE, 'w') as fout:
-    fout.writelines(data[6:-1])
\ No newline at end of file
+MARKER = "// fizzim code generation ends"
+SKIP_HEAD = 6  # banner lines after the marker
+CACHE = ".formal_cache.json"  # (mtime, size, sha256) of every processed FSM file
+
+
+def extract(FSM, USERCODE):
+    """
+    Write the backup and the user code of ``FSM`` (single pass, through temporary files)
+
+    :return: sha256 of ``FSM``
+    """
+    FSM_bak = FSM + "bak"
+    h = hashlib.sha256()
+    found = False
+    skip = SKIP_HEAD
+    held = None  # the last line is dropped, so every line is written one line late
+    with open(FSM) as fin, \
+            open(FSM_bak + ".part", "w") as fbak, open(USERCODE + ".part", "w") as fusr:
+        for line in fin:
+            h.update(line.encode())
+            fbak.write(line)
+            if not found:
+                found = line.startswith(MARKER)
+            elif skip:
+                skip -= 1
+            else:
+                if held is not None:
+                    fusr.write(held)
+                held = line
+    os.replace(FSM_bak + ".part", FSM_bak)
+    os.replace(USERCODE + ".part", USERCODE)
+    return h.hexdigest()
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def backup(FSM, USERCODE="usercode.tmp", cache=None):
+    """
+    Save the user code of ``FSM`` into ``USERCODE`` unless ``FSM`` is unchanged
+
+    :param FSM: generated verilog file
+    :param USERCODE: user code file (read back by fizzim)
+    :param cache: dictionary of the previous runs (updated)
+    :return: True if the files were (re)written
+    """
+    cache = {} if cache is None else cache
+    key = os.path.realpath(FSM) + ":" + os.path.realpath(USERCODE)
+    st = os.stat(FSM)
+    entry = cache.get(key)
+    outputs = os.path.exists(FSM + "bak") and os.path.exists(USERCODE)
+    if outputs and entry and entry[:2] == [st.st_mtime_ns, st.st_size]:
+        return False
+    if outputs and entry and entry[2] == _sha256(FSM):  # touched, not modified
+        entry[:2] = [st.st_mtime_ns, st.st_size]
+        return False
+    cache[key] = [st.st_mtime_ns, st.st_size, extract(FSM, USERCODE)]
+    return True
+
+
+def main(argv):
+    if not argv:
+        print("usage: formal.py FSM [USERCODE] | formal.py FSM[:USERCODE] ...")
+        return 2
+    if len(argv) == 2 and ":" not in argv[1] and not argv[1].endswith(".v"):
+        argv = [argv[0] + ":" + argv[1]]  # formal.py FSM USERCODE
+
+    jobs = []
+    for arg in argv:
+        FSM, _, name = arg.partition(":")
+        jobs.append((FSM, (name or "usercode") + ".tmp"))
+    usercode = [u for _, u in jobs]
+    if len(set(usercode)) != len(usercode):
+        print("formal.py: give every FSM its own user code file (FSM:USERCODE)")
+        return 2
+
+    try:
+        with open(CACHE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    for FSM, USERCODE in jobs:
+        done = backup(FSM, USERCODE, cache)
+        print("%s: %s" % (FSM, ("user code saved in " + USERCODE) if done else "unchanged"))
+    with open(CACHE + ".part", "w") as f:
+        json.dump(cache, f)
+    os.replace(CACHE + ".part", CACHE)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
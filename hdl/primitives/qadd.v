@@ -103,18 +103,28 @@ begin
     if(f_past_valid == 1'b1) f_sum_valid <= 1'b1;
 end
 
-// selecting from a set of tests
-localparam [2:0] FORMAL_TEST = 3'd1;
+// selecting from a set of tests (any one with read -formal -DFORMAL_TEST_SEL=<n>)
+`ifdef  FORMAL_TEST_SEL
+localparam [2:0] FORMAL_TEST = `FORMAL_TEST_SEL;
+`else
+localparam [2:0] FORMAL_TEST = 3'd0;
+`endif
 
 generate
 
     // cover 10.23-15.67 = -5.44
     if (FORMAL_TEST == 3'b000)
     begin
+        // magnitudes in Q format (truncated, as tb_common.fixed_point.to_q)
+        localparam [N-2:0] F_A = (1023 << Q) / 100; // 10.23
+        localparam [N-2:0] F_B = (1567 << Q) / 100; // 15.67
+        localparam [N-2:0] F_C = (544 << Q) / 100;  // 5.44
         always @(posedge i_clk)
         begin
-            assume((i_a == 10) && (i_b == 5));
-            cover(o_sum == 15);
+            assume((a == {1'b0, F_A}) && (b == {1'b1, F_B}));
+            // c registered from these inputs, negative and within one LSB of 5.44
+            if (f_past_valid)
+                cover((c[N-1] == 1'b1) && (c[N-2:0] + 1 >= F_C) && (c[N-2:0] <= F_C + 1));
         end
     end
 
@@ -70,8 +70,12 @@ begin
     if(f_past_valid == 1'b1) f_sum_valid <= 1'b1;
 end
 
-// selecting from a set of tests
+// selecting from a set of tests (any one with read -formal -DFORMAL_TEST_SEL=<n>)
+`ifdef  FORMAL_TEST_SEL
+localparam [2:0] FORMAL_TEST = `FORMAL_TEST_SEL;
+`else
 localparam [2:0] FORMAL_TEST = 3'd1;
+`endif
 
 generate
 
@@ -0,0 +1,50 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Cycle-accurate, vectorized model of int_clk_div.v
+
+After a reset edge (``i_rstn`` low) the FSM is in RESET with ``counter``,
+``o_clk`` and ``o_clk_stb`` cleared. Every edge with ``i_rstn`` and ``i_ce``
+high moves the FSM to START and advances the datapath by one step; every other
+edge holds it (IDLE, or RESET with the registers already cleared). From reset,
+the counter runs ``0, 1, ..., HALF_CLOCK_STRECH-1, 0, ...`` and ``o_clk``
+toggles whenever it wraps, so after ``n`` steps
+
+* ``counter = (n mod HALF_CLOCK_STRECH) mod 2^COUNTER_WID``
+* ``o_clk = floor(n / HALF_CLOCK_STRECH) mod 2``
+
+and a whole input sequence only needs a cumulative sum of the steps since the
+last reset.
+"""
+
+import numpy as np
+
+
+def clk_div_model(ce, rstn=None, HALF_CLOCK_STRECH=4, COUNTER_WID=19, steps=0):
+    """
+    ``o_clk`` and ``counter`` after each rising edge
+
+    :param ce: ``i_ce`` sampled at each edge (array of 0/1)
+    :param rstn: ``i_rstn`` sampled at each edge (all 1 if None)
+    :param HALF_CLOCK_STRECH: parameter of int_clk_div.v (at least 2)
+    :param COUNTER_WID: parameter of int_clk_div.v
+    :param steps: datapath steps since the last reset before the first edge
+                  (0 after a reset or at power up)
+    :return: (o_clk, counter, steps after the last edge), to be passed on as
+             ``steps`` for the next part of a long sequence
+    """
+    H = int(HALF_CLOCK_STRECH)
+    if H < 2 or H - 2 >= (1 << COUNTER_WID):
+        raise ValueError("HALF_CLOCK_STRECH=%d not supported with COUNTER_WID=%d"
+                         % (H, COUNTER_WID))
+    ce = np.asarray(ce, dtype=np.int64) != 0
+    rstn = np.ones(len(ce), dtype=bool) if rstn is None else np.asarray(rstn, dtype=np.int64) != 0
+
+    n = np.cumsum(ce & rstn) + int(steps)
+    # steps counted before the last reset edge (n does not move on reset edges)
+    before = np.maximum.accumulate(np.where(~rstn, n, 0))
+    n = n - before
+    o_clk = (n // H) & 1
+    counter = (n % H) & ((1 << COUNTER_WID) - 1)
+    return o_clk, counter, int(n[-1]) if len(n) else int(steps)
@@ -5,23 +5,30 @@
 Module for testing int_clk_div.v
 
 **Progress:**
-Just some bassic tests got added.
+Just some bassic tests got added. The expected ``o_clk`` comes from the
+cycle-accurate model in clk_div_model.py.
 """
 
+import os
 import random
 
 import cocotb
-import cocotb.wavedrom
-from cocotb.binary import BinaryValue
+import numpy as np
 from cocotb.clock import Clock
 from cocotb.decorators import coroutine
 from cocotb.drivers import BitDriver
 from cocotb.monitors import Monitor
 from cocotb.regression import TestFactory
 from cocotb.result import TestFailure
-from cocotb.scoreboard import Scoreboard
 from cocotb.triggers import RisingEdge, Timer
 
+from clk_div_model import clk_div_model
+from tb_common.build_cache import hdl_params
+from tb_common.scoreboard import StreamScoreboard
+from tb_common.stimulus import test_seed
+from tb_common.streaming import check, stream
+from tb_common.trace import TraceRecorder
+
 
 def input_gen():
     """
@@ -76,36 +83,27 @@ class CNT_TB(object):
 
     Think of it like the *overall setup* containing DUT, signal generator and oscilloscope!.
 
-    :param dut: Veriog module under test
-    :param init_val: ``BinaryValue`` which must be captured by the output monitor with the first rising clock edge
+    :param dut: Veriog module under test (in its reset state, e.g., at power up)
     """
-    def __init__(self, dut, init_val):
+    def __init__(self, dut):
 
         self.stopped = False  # just a flag ... this is like a pause/play button
 
-        # bring in the DUT
+        # bring in the DUT (out of reset)
         self.dut = dut
+        dut.i_rstn <= 1
+        self.params = hdl_params(COUNTER_WID=19, HALF_CLOCK_STRECH=4)
+        self.steps = 0  # datapath steps of the model since reset
 
         # start input stimulus (bring in the signal generator)
         self.input_drv = BitDriver(signal=dut.i_ce,
                                    clk=dut.i_clk,
                                    generator=input_gen())
 
-        # start monitoring the output (bring in the oscilloscope and switch it ON)
-        self.output_mon = BitMonitor(name="output",
-                                     signal=dut.o_clk,
-                                     clk=dut.i_clk)
-
-        # check against expected values (note down the readings and compare with the expected)
-        self.expected_output = [init_val]
-        self.scoreboard = Scoreboard(dut)
-        self.scoreboard.add_interface(self.output_mon, self.expected_output)
-
-        # prepare the next expected value using/calling a GOLDEN reference
-        self.input_mon = BitMonitor(name="input",
-                                    signal=dut.o_clk,
-                                    clk=dut.i_clk,
-                                    callback=self.reference)
+        # monitor inputs and output (bring in the oscilloscope) and compare the
+        # output with the GOLDEN reference, in batches and in constant memory
+        self.scoreboard = StreamScoreboard(dut, dut.i_clk, [dut.i_ce, dut.i_rstn], dut.o_clk,
+                                           self.reference, latency=1)
 
     def start(self):
         """
@@ -114,6 +112,7 @@ class CNT_TB(object):
         Think of it like switching ON the signal generator!
         """
         self.input_drv.start()
+        self.scoreboard.start()
 
     def stop(self):
         """
@@ -125,16 +124,17 @@ class CNT_TB(object):
         self.input_drv.stop()
         self.stopped = True # after stopping, update the status flag
 
-    def reference(self, transaction):
+    def reference(self, ce, rstn):
         """
-        Golden reference model.
+        Golden reference model (called by the scoreboard for consecutive batches of edges).
 
         Think of it like a reference (expected) signal generator!
 
-        :param transaction: transaction received
+        :param ce: ``i_ce`` sampled at each rising edge
+        :param rstn: ``i_rstn`` sampled at each rising edge
         """
-        if not self.stopped:
-            self.expected_output.append(transaction)
+        o_clk, _, self.steps = clk_div_model(ce, rstn, steps=self.steps, **self.params)
+        return o_clk
 
 
 @cocotb.test(skip=False)
@@ -150,7 +150,7 @@ def class_test(dut):
     clkedge = RisingEdge(dut.i_clk)
 
     # instantiate the test fixure
-    tb = CNT_TB(dut, init_val=BinaryValue(0))
+    tb = CNT_TB(dut)
 
     # start the stimulus and wait for 100 clock cycles
     tb.start()
@@ -161,11 +161,50 @@ def class_test(dut):
     # the resulting output of the DUT
     tb.stop()
     yield clkedge
+    tb.scoreboard.stop()
 
     # print result of the scoreboard (submit the readings)
     raise tb.scoreboard.result
 
 
+def enable_pattern(rng, n, reset_rate=1e-3):
+    """
+    Random ``i_ce`` runs of 1 to 5 cycles (like input_gen) and sparse resets
+
+    :param rng: NumPy random generator
+    :param n: number of cycles
+    :param reset_rate: probability of a reset cycle
+    :return: (ce, rstn) arrays, ``rstn[0]`` low so that the run starts from reset
+    """
+    runs = rng.integers(1, 6, size=n)
+    ce = np.repeat(np.arange(len(runs)) & 1, runs)[:n]
+    rstn = (rng.random(n) >= reset_rate).astype(np.int64)
+    rstn[0] = 0
+    return ce, rstn
+
+
+@cocotb.test(skip=False)
+def stream_test(dut, n=None):
+    """
+    Random enable pattern (with resets), one cycle per sample, checked in one
+    go against the vectorized model
+
+    :param dut: Veriog module under test
+    :param n: number of cycles (``STREAM_SAMPLES`` environment variable, 10000 by default)
+    """
+    n = n or int(os.environ.get("STREAM_SAMPLES", 10000))
+    params = hdl_params(COUNTER_WID=19, HALF_CLOCK_STRECH=4)
+    rng = np.random.default_rng(test_seed("stream_test"))
+    ce, rstn = enable_pattern(rng, n)
+
+    cocotb.fork(Clock(dut.i_clk, 10, units='ns').start())
+    yield RisingEdge(dut.i_clk)
+
+    o_clk = yield stream(dut.i_clk, [dut.i_ce, dut.i_rstn], [ce, rstn], dut.o_clk)
+    expected, _, _ = clk_div_model(ce, rstn, **params)
+    check(dut, "stream_test", expected, o_clk, ce, rstn)
+
+
 @cocotb.test(skip=False)
 def wavedrom_test(dut):
     """
@@ -173,11 +212,12 @@ def wavedrom_test(dut):
 
     :param dut: Veriog module under test
     """
-    with cocotb.wavedrom.trace(dut.i_rstn,
-                               dut.i_ce,
-                               dut.counter,
-                               dut.state,
-                               clk=dut.i_clk) as waves:
+    with TraceRecorder(dut.i_clk,
+                       [dut.i_rstn,
+                        dut.i_ce,
+                        dut.counter,
+                        dut.state],
+                       path='trace.npz') as waves:
 
         # start the clock
         cocotb.fork(Clock(dut.i_clk, 10, units='ns').start())
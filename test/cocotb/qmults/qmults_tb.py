@@ -0,0 +1,72 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Module for testing qmults.v
+
+**Progress:**
+Back-to-back (saturated) throughput test through the start/complete
+handshake, checked in bulk against the model in tb_common.fixed_point.
+"""
+
+import os
+
+import cocotb
+import numpy as np
+from cocotb.clock import Clock
+from cocotb.result import TestFailure
+from cocotb.triggers import RisingEdge
+
+from tb_common.build_cache import hdl_params
+from tb_common.fixed_point import qmults, qmults_latency
+from tb_common.handshake import HandshakeDriver, HandshakeMonitor, throughput
+from tb_common.stimulus import test_seed
+from tb_common.streaming import check, random_words
+
+
+@cocotb.test(skip=False)
+def throughput_test(dut, n=None):
+    """
+    Randomized products launched back-to-back; reports per operation latency and
+    sustained operations per cycle (vs. one per cycle for signed_multiply.v)
+
+    :param dut: Veriog module under test
+    :param n: number of products (``STREAM_SAMPLES`` environment variable, 1000 by default)
+    """
+    n = n or int(os.environ.get("STREAM_SAMPLES", 1000))
+    params = hdl_params(Q=15, N=32)
+    Q, N = params["Q"], params["N"]
+
+    # start the clock
+    cocotb.fork(Clock(dut.i_clk, 10, units="ns").start())
+    clkedge = RisingEdge(dut.i_clk)
+
+    # randomize the whole input data (replayable with RANDOM_SEED, see tb_common/stimulus.py)
+    rng = np.random.default_rng(test_seed("throughput_test"))
+    A = random_words(rng, N, n)
+    B = random_words(rng, N, n)
+
+    dut.i_start <= 0
+    yield clkedge  # synchronize ourselves with the clock
+
+    # keep the multiplier busy until all the products are collected
+    monitor = HandshakeMonitor(dut.i_clk, dut.o_complete, [dut.o_result_out, dut.o_overflow], n)
+    driver = HandshakeDriver(dut.i_clk, dut.i_start, [dut.i_multiplicand, dut.i_multiplier],
+                             [A, B], monitor)
+    driver.start()
+    yield monitor.start().join()
+
+    # performance
+    latency, ops_per_cycle = throughput(driver.launched, monitor.completed)
+    dut._log.info("latency %d..%d cycles (expected %d), %.4f products per cycle "
+                  "(%.1fx slower than signed_multiply.v)"
+                  % (latency.min(), latency.max(), qmults_latency(N), ops_per_cycle,
+                     1.0 / ops_per_cycle))
+    if np.any(latency != qmults_latency(N)):
+        raise TestFailure("unexpected latency: %s" % np.unique(latency))
+
+    # compare with the reference model (in bulk)
+    result, overflow = monitor.data
+    expected_result, expected_overflow = qmults(A, B, Q, N)
+    check(dut, "throughput_test (overflow)", expected_overflow, overflow, A, B)
+    check(dut, "throughput_test", expected_result, result, A, B)
@@ -0,0 +1,197 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Parallel regression runner for all the cocotb testbenches.
+
+Every directory next to this script with a ``Makefile`` defining ``MODULE`` is
+a testbench. They are built and run concurrently (one ``make`` per directory,
+``-j`` at a time), with their results in their own directory under ``--out``,
+and the per-module ``results.xml`` files are merged into ``<out>/results.xml``.
+Simulators come from the shared build cache unless ``--isolated`` is given::
+
+    python3 run_regression.py -j 4                        # everything
+    python3 run_regression.py signed_adder int_clk_div    # a selection
+    python3 run_regression.py -- GOLDEN_MODEL=both        # arguments for make
+
+Parameter sweeps build one simulator per ``--params`` set (each one cached on
+its own) and run all of them concurrently::
+
+    python3 run_regression.py signed_adder signed_multiply \
+        -p "AWIDTH=8 BWIDTH=8" -p "AWIDTH=12 BWIDTH=5" -p "AWIDTH=16 BWIDTH=16"
+
+``--sweep`` runs the :data:`SWEEP_PARAMS` sets, up to 32 x 32 bit operands (64
+bit products)::
+
+    python3 run_regression.py --sweep signed_multiply unsigned_multiply -- TESTCASE=sweep_test_001
+"""
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+TEST_DIR = os.path.dirname(os.path.realpath(__file__))
+
+# default parameter sweep (--sweep) of the arithmetic primitives
+SWEEP_PARAMS = ("AWIDTH=8 BWIDTH=8", "AWIDTH=12 BWIDTH=5", "AWIDTH=16 BWIDTH=16",
+                "AWIDTH=32 BWIDTH=32")
+
+
+def discover(test_dir=TEST_DIR):
+    """
+    Names of all the testbench directories (sorted)
+    """
+    found = []
+    for name in sorted(os.listdir(test_dir)):
+        makefile = os.path.join(test_dir, name, "Makefile")
+        if os.path.isfile(makefile):
+            with open(makefile) as f:
+                if re.search(r"^MODULE\s*:?=", f.read(), re.M):
+                    found.append(name)
+    return found
+
+
+def run_name(name, params=None):
+    """
+    Name of the run of testbench ``name`` with ``params`` (e.g., ``signed_adder-AWIDTH8-BWIDTH8``)
+    """
+    if not params:
+        return name
+    return "-".join([name] + [p.replace("=", "") for p in params.split()])
+
+
+def run_one(name, out_dir, extra_env=None, make_args=(), isolated=False, params=None):
+    """
+    Build and run one testbench directory
+
+    :param name: testbench directory name
+    :param out_dir: regression output directory
+    :param extra_env: additional environment variables for ``make``
+    :param make_args: additional ``make`` arguments (e.g., ``GOLDEN_MODEL=both``)
+    :param isolated: build in a private directory under ``out_dir`` instead of
+                     the shared build cache (see ``tb_common/build_cache.py``)
+    :param params: HDL parameters for this run, e.g., ``"AWIDTH=8 BWIDTH=8"``
+    :return: (run name, return code, wall time, path of results.xml, path of the log)
+    """
+    run = run_name(name, params)
+    build_dir = os.path.join(out_dir, run)
+    os.makedirs(build_dir, exist_ok=True)
+    results = os.path.join(build_dir, "results.xml")
+    log = os.path.join(build_dir, "make.log")
+    # results and coverage of a previous run in this directory (Coverage.save
+    # adds up the tests of one run, not the runs)
+    for old in (results, os.path.join(build_dir, "coverage.json")):
+        if os.path.exists(old):
+            os.remove(old)
+
+    env = dict(os.environ, COCOTB_RESULTS_FILE=results, **(extra_env or {}))
+    cmd = ["make", "-C", os.path.join(TEST_DIR, name)] + list(make_args)
+    if params:
+        cmd.append("PARAMS=%s" % params)
+    if isolated:
+        cmd.append("SIM_BUILD=%s" % os.path.join(build_dir, "sim_build"))
+
+    start = time.time()
+    with open(log, "w") as f:
+        ret = subprocess.call(cmd, env=env, stdout=f, stderr=subprocess.STDOUT)
+    wall = time.time() - start
+
+    # older cocotb versions ignore COCOTB_RESULTS_FILE: take the results file
+    # of the testbench directory, but only if this run wrote it (a stale or
+    # committed one is no result of this run)
+    fallback = os.path.join(TEST_DIR, name, "results.xml")
+    if (not os.path.exists(results) and os.path.exists(fallback)
+            and os.path.getmtime(fallback) >= start):
+        shutil.copyfile(fallback, results)
+    return run, ret, wall, results, log
+
+
+def merge(runs, out_file):
+    """
+    Merge the per-module ``results.xml`` files into one ``testsuites`` report;
+    a run without results file or with a failing ``make`` counts as a failed
+    ``build`` test
+
+    :param runs: list of :func:`run_one` return values
+    :param out_file: merged report
+    :return: list of (module, test, passed, sim_time_ns, time, ratio_time)
+    """
+    merged = ET.Element("testsuites", name="results")
+    rows = []
+    for name, ret, wall, results, log in runs:
+        suite = ET.SubElement(merged, "testsuite", name=name, package=name,
+                              time="%.3f" % wall)
+        if not os.path.exists(results) or ret:
+            case = ET.SubElement(suite, "testcase", classname=name, name="build")
+            ET.SubElement(case, "failure", message="%s, see %s"
+                          % ("make exited with %d" % ret if ret else "no results.xml", log))
+            rows.append((name, "build", False, 0.0, wall, 0.0))
+        if not os.path.exists(results):
+            continue
+        for elem in ET.parse(results).getroot().iter():
+            if elem.tag == "property":
+                suite.append(elem)
+            elif elem.tag == "testcase":
+                suite.append(elem)
+                passed = elem.find("failure") is None and elem.find("error") is None
+                rows.append((name, elem.get("name"), passed,
+                             float(elem.get("sim_time_ns", 0)),
+                             float(elem.get("time", 0)),
+                             float(elem.get("ratio_time", 0))))
+    ET.ElementTree(merged).write(out_file)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("testbenches", nargs="*",
+                        help="testbench directories to run (default: all)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of testbenches run at the same time")
+    parser.add_argument("-o", "--out", default=os.path.join(TEST_DIR, "regression"),
+                        help="output directory (default: %(default)s)")
+    parser.add_argument("--isolated", action="store_true",
+                        help="private build directories instead of the shared build cache")
+    parser.add_argument("-p", "--params", action="append",
+                        help="HDL parameters, e.g., \"AWIDTH=8 BWIDTH=8\" (repeat for a sweep)")
+    parser.add_argument("--sweep", action="store_true",
+                        help="add the parameter sets of SWEEP_PARAMS (8 to 32 bit operands)")
+    argv = sys.argv[1:] if argv is None else argv
+    split = argv.index("--") if "--" in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    make_args = argv[split + 1:]  # passed on to make
+
+    names = args.testbenches or discover()
+    if args.sweep:
+        args.params = (args.params or []) + list(SWEEP_PARAMS)
+    os.makedirs(args.out, exist_ok=True)
+
+    start = time.time()
+    jobs = [(n, p) for n in names for p in (args.params or [None])]
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        runs = list(pool.map(lambda job: run_one(job[0], args.out, make_args=make_args,
+                                                 isolated=args.isolated, params=job[1]), jobs))
+    wall = time.time() - start
+
+    rows = merge(runs, os.path.join(args.out, "results.xml"))
+
+    # summary
+    print("%-32s %-20s %-6s %14s %10s %12s"
+          % ("module", "test", "result", "sim_time_ns", "time", "ratio_time"))
+    for module, test, passed, sim_time, t, ratio in rows:
+        print("%-32s %-20s %-6s %14.3f %10.3f %12.2f"
+              % (module, test, "PASS" if passed else "FAIL", sim_time, t, ratio))
+    n_failed = sum(not r[2] for r in rows)
+    print("%d tests, %d failed, %d runs in %.2f s wall time (%.2f s serial)"
+          % (len(rows), n_failed, len(runs), wall, sum(r[2] for r in runs)))
+    return 1 if n_failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
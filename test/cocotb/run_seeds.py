@@ -0,0 +1,142 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Run the same testbenches over many random seeds in parallel.
+
+Every seed is a separate ``make`` (a separate simulator process) with
+``RANDOM_SEED`` set, so the tests draw their stimulus from it (see
+``tb_common/stimulus.py``). The simulator is built once per testbench before
+the seeds fan out over ``-j`` processes, each seed with its results under
+``<out>/seed-<seed>/``, merged into ``<out>/results.xml``. Failing seeds are
+listed with the command replaying them exactly. The functional coverage of
+all the seeds of a testbench is merged (see ``tb_common/coverage.py``); with
+``--until-covered`` the seeds run in waves of ``-j`` and a testbench stops as
+soon as its merged coverage closes (``-n`` is then the budget)::
+
+    python3 run_seeds.py signed_adder -n 64 -j 8                       # 64 new seeds
+    python3 run_seeds.py signed_adder -s 1234 -- TESTCASE=stream_test  # replay one
+    python3 run_seeds.py signed_multiply -n 16 -p "AWIDTH=8 BWIDTH=8" -- SCOREBOARD_SAMPLES=1000000
+    python3 run_seeds.py signed_multiply -n 256 --until-covered -- TESTCASE=scoreboard_test
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+from run_regression import TEST_DIR, discover, merge, run_name, run_one
+from tb_common import coverage
+
+
+def failed_tests(results):
+    """
+    Names of the failed tests in ``results`` (a results.xml file), ``["build"]`` if missing
+    """
+    if not os.path.exists(results):
+        return ["build"]
+    return [case.get("name") for case in ET.parse(results).getroot().iter("testcase")
+            if case.find("failure") is not None or case.find("error") is not None]
+
+
+def replay(name, seed, tests, params=None, make_args=()):
+    """
+    ``make`` command replaying ``tests`` of testbench ``name`` with ``seed``
+    """
+    cmd = ["make", "-C", os.path.relpath(os.path.join(TEST_DIR, name)), "RANDOM_SEED=%d" % seed]
+    if tests and "build" not in tests:
+        cmd.append("TESTCASE=%s" % ",".join(tests))
+    if params:
+        cmd.append("PARAMS='%s'" % params)
+    return " ".join(cmd + [a for a in make_args if not a.startswith("TESTCASE=")])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("testbenches", nargs="*",
+                        help="testbench directories to run (default: all)")
+    parser.add_argument("-n", "--seeds", type=int, default=os.cpu_count(),
+                        help="number of new random seeds (default: %(default)s)")
+    parser.add_argument("-s", "--seed", type=int, action="append",
+                        help="run this seed (repeat for more), e.g., to replay a failure")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of simulations run at the same time")
+    parser.add_argument("-o", "--out", default=os.path.join(TEST_DIR, "regression", "seeds"),
+                        help="output directory (default: %(default)s)")
+    parser.add_argument("-p", "--params", help="HDL parameters, e.g., \"AWIDTH=8 BWIDTH=8\"")
+    parser.add_argument("--until-covered", action="store_true",
+                        help="stop a testbench as soon as its merged coverage closes")
+    argv = sys.argv[1:] if argv is None else argv
+    split = argv.index("--") if "--" in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    make_args = argv[split + 1:]  # passed on to make
+
+    names = args.testbenches or discover()
+    seeds = args.seed or [random.SystemRandom().getrandbits(31) for _ in range(args.seeds)]
+    os.makedirs(args.out, exist_ok=True)
+
+    def job(name_seed):
+        name, seed = name_seed
+        run = run_one(name, os.path.join(args.out, "seed-%d" % seed),
+                      extra_env={"RANDOM_SEED": str(seed)}, make_args=make_args,
+                      params=args.params)
+        return ("%s@%d" % (run[0], seed),) + run[1:]
+
+    def merged_coverage(name, done):
+        return coverage.merge([os.path.join(args.out, "seed-%d" % s, run_name(name, args.params),
+                                            "coverage.json") for n, s in done if n == name])
+
+    # the first seed builds the simulator (shared build cache), the others reuse it
+    step = args.jobs if args.until_covered else len(seeds)
+    waves = [seeds[:1]] + [seeds[i:i + step] for i in range(1, len(seeds), step)]
+    pending, done, runs = list(names), [], []
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        for wave in waves:
+            todo = [(n, s) for n in pending for s in wave]
+            runs += list(pool.map(job, todo))
+            done += todo
+            if args.until_covered:
+                # no coverage groups at all never closes
+                pending = [n for n in pending if coverage.holes(merged_coverage(n, done)) or
+                           not merged_coverage(n, done)]
+            if not pending:
+                break
+    wall = time.time() - start
+
+    rows = merge(runs, os.path.join(args.out, "results.xml"))
+
+    # summary
+    failures = []
+    for (name, seed), run in zip(done, runs):
+        tests = failed_tests(run[3])
+        if run[1] and not tests:
+            tests = ["build"]  # make failed
+        if tests:
+            failures.append((name, seed, tests))
+    print("%-32s %8s %8s %10s" % ("module", "seeds", "failed", "coverage"))
+    for name in names:
+        groups = merged_coverage(name, done)
+        n_bins = sum(len(g["bins"]) for g in groups.values())
+        missing = coverage.holes(groups)
+        print("%-32s %8d %8d %10s" % (name, sum(d[0] == name for d in done),
+                                      sum(f[0] == name for f in failures),
+                                      "%d/%d" % (n_bins - sum(map(len, missing.values())), n_bins)
+                                      if groups else "-"))
+        for group, bins in missing.items():
+            print("    %s holes: %s" % (group, ", ".join(bins)))
+    for name, seed, tests in failures:
+        print("FAIL %s seed %d (%s): %s" % (name, seed, ", ".join(tests),
+                                            replay(name, seed, tests, args.params, make_args)))
+    n_failed = sum(not r[2] for r in rows)
+    print("%d tests over %d seeds, %d failed, %d runs in %.2f s wall time (%.2f s serial)"
+          % (len(rows), len(set(s for n, s in done)), n_failed, len(runs), wall,
+             sum(r[2] for r in runs)))
+    return 1 if n_failed or failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
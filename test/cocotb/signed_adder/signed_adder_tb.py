@@ -12,8 +12,6 @@ import sys
 sys.path.insert(1, "/usr/lib/python3/dist-packages")  # for gnuradio
 
 import cocotb
-import cocotb.wavedrom
-from cocotb.binary import BinaryValue
 from cocotb.clock import Clock
 from cocotb.decorators import coroutine
 from cocotb.drivers import BitDriver
@@ -26,18 +24,26 @@ from cocotb.triggers import RisingEdge, Timer, ReadWrite, ReadOnly
 import random
 import numpy as np
 from adder_model import adder_model
-from signed_adder_gr import main
+from tb_common.arith_tests import flowgraph_model, register
+from tb_common.conversions import to_signed
+from tb_common.models import add_vff, golden_models, reference
+from tb_common.trace import TraceRecorder
+
+
+LATENCY = 1  # clock cycles from i_a/i_b to o_sum (registered once)
+
+
+# golden reference model using the GNU Radio flowgraph (see tb_common/arith_tests.py)
+gr_model = flowgraph_model("add_vff", "signed_adder_gr")
 
 
 def bin2sign(bin_value):
     """
     A simple functional to convert 2's compliment binary value to signed integer
 
-    :param bin_value: 2's compliment binary value
+    :param bin_value: 2's compliment binary value (signal handle), any width
     """
-    vec = BinaryValue()
-    vec.signed_integer = bin_value.value
-    return vec.signed_integer
+    return to_signed(bin_value.value.integer, len(bin_value))
 
 
 @cocotb.test(timeout_time=50, timeout_unit="ns", skip=False)
@@ -47,7 +53,7 @@ def basic_simulation(dut):
 
     :param dut: Veriog module under test
     """
-    with cocotb.wavedrom.trace(dut.i_a, dut.i_b, dut.o_sum, clk=dut.i_clk) as waves:
+    with TraceRecorder(dut.i_clk, [dut.i_a, dut.i_b, dut.o_sum], signed=True) as waves:
 
         # start the clock
         cocotb.fork(Clock(dut.i_clk, 10, units="ns").start())
@@ -105,23 +111,10 @@ def basic_test(dut):
         yield clkedge
         yield ReadWrite()  # there seems some "updating" issue with cocotb here! ... without this statement, this test won't pass
 
-        # format A if it is a negative number
-        if A < 0:
-            i_A = bin2sign(dut.i_a)
-        else:
-            i_A = int(dut.i_a)
-
-        # format B if it is a negative number
-        if B < 0:
-            i_B = bin2sign(dut.i_b)
-        else:
-            i_B = int(dut.i_b)
-
-        # format the output if it is a negative number
-        if adder_model(A, B) < 0:
-            o_SUM = bin2sign(dut.o_sum)
-        else:
-            o_SUM = int(dut.o_sum)
+        # decode the 2's compliment values (no need to check the sign first)
+        i_A = bin2sign(dut.i_a)
+        i_B = bin2sign(dut.i_b)
+        o_SUM = bin2sign(dut.o_sum)
 
         # compare with the reference model
         if o_SUM != adder_model(A, B):
@@ -134,10 +127,14 @@ def basic_test(dut):
             )
 
 
-@cocotb.test(timeout_time=200, timeout_unit="ns", skip=False)
-def gr_test(dut):
+@cocotb.coroutine
+def gr_test(dut, model=None):
     """
-    Randmized test for o_sum = i_a + i_b (signed addition/subtraction) using GNU Radio
+    Randmized test for o_sum = i_a + i_b (signed addition/subtraction) against the golden model
+
+    :param dut: Veriog module under test
+    :param model: golden model (``numpy``, ``gnuradio`` or ``both``), see
+                  :func:`tb_common.models.reference`
     """
 
     # start the clock
@@ -162,44 +159,39 @@ def gr_test(dut):
         yield clkedge
         yield ReadWrite()  # there seems some "updating" issue with cocotb here! ... without this statement, this test won't pass
 
-        # format A if it is a negative number
-        if A < 0:
-            i_A = bin2sign(dut.i_a)
-        else:
-            i_A = int(dut.i_a)
-
-        # format B if it is a negative number
-        if B < 0:
-            i_B = bin2sign(dut.i_b)
-        else:
-            i_B = int(dut.i_b)
-
-        # format the output if it is a negative number
-        if adder_model(A, B) < 0:
-            o_SUM = bin2sign(dut.o_sum)
-        else:
-            o_SUM = int(dut.o_sum)
+        # decode the 2's compliment values (no need to check the sign first)
+        i_A = bin2sign(dut.i_a)
+        i_B = bin2sign(dut.i_b)
+        o_SUM = bin2sign(dut.o_sum)
 
         a_lst.append(i_A)
         b_lst.append(i_B)
         sum_lst.append(o_SUM)
 
-    # pass the data to Gnu Radio and get the return data
-    np.array(a_lst, dtype=np.float32).tofile("data_a.bin")
-    np.array(b_lst, dtype=np.float32).tofile("data_b.bin")
-    main()
-    sum_lst_gr = np.fromfile("data_sum.bin", dtype=np.float32)
+    # get the expected data from the golden model
+    sum_lst_ref = reference(add_vff, gr_model, a_lst, b_lst, model)
 
-    # compare the returned data with verilator output
-    if np.array_equal(sum_lst_gr, np.array(sum_lst)):
+    # compare the expected data with verilator output
+    if np.array_equal(sum_lst_ref, np.array(sum_lst)):
         dut._log.info("gr_test passed")
     else:
         raise TestFailure("gr_test failed")
 
     # print for convinience
-    print(np.fromfile("data_a.bin", dtype=np.float32))
-    print(np.fromfile("data_b.bin", dtype=np.float32))
-    print(np.fromfile("data_sum.bin", dtype=np.float32))
+    print(np.array(a_lst, dtype=np.float32))
+    print(np.array(b_lst, dtype=np.float32))
+    print(sum_lst_ref)
+
+
+# Register the golden model tests, one per GOLDEN_MODEL (e.g., gr_test_numpy_001)
+for model in golden_models():
+    factory = TestFactory(gr_test)
+    factory.add_option("model", [model])
+    factory.generate_tests(postfix="_" + model)
+
+
+# stream_test, scoreboard_test and the sweep tests (see tb_common/arith_tests.py)
+register(globals(), "signed_adder", "add", "o_sum", signed=True, latency=LATENCY, model=adder_model)
 
 
 if __name__ == "__main__":
@@ -18,11 +18,12 @@ from argparse import ArgumentParser
 from gnuradio.eng_arg import eng_float, intx
 from gnuradio import eng_notation
 import relative_path  # embedded python module
+import numpy as np
 
 
 class signed_multiply_gr(gr.top_block):
 
-    def __init__(self):
+    def __init__(self, throttle=True):
         gr.top_block.__init__(self, "Signed Multiply Gr")
 
         ##################################################
@@ -49,10 +50,15 @@ class signed_multiply_gr(gr.top_block):
         # Connections
         ##################################################
         self.connect((self.blocks_multiply_xx_0, 0), (self.blocks_file_sink_0, 0))
-        self.connect((self.blocks_throttle_0, 0), (self.blocks_multiply_xx_0, 0))
-        self.connect((self.blocks_throttle_0_0, 0), (self.blocks_multiply_xx_0, 1))
-        self.connect((self.file_source_0, 0), (self.blocks_throttle_0, 0))
-        self.connect((self.file_source_0_0, 0), (self.blocks_throttle_0_0, 0))
+        if throttle:
+            self.connect((self.blocks_throttle_0, 0), (self.blocks_multiply_xx_0, 0))
+            self.connect((self.blocks_throttle_0_0, 0), (self.blocks_multiply_xx_0, 1))
+            self.connect((self.file_source_0, 0), (self.blocks_throttle_0, 0))
+            self.connect((self.file_source_0_0, 0), (self.blocks_throttle_0_0, 0))
+        else:
+            # batch mode: no throttling, the graph runs as fast as it can
+            self.connect((self.file_source_0, 0), (self.blocks_multiply_xx_0, 0))
+            self.connect((self.file_source_0_0, 0), (self.blocks_multiply_xx_0, 1))
 
 
     def get_samp_rate(self):
@@ -89,5 +95,33 @@ def main(top_block_cls=signed_multiply_gr, options=None):
     tb.wait()
 
 
+def batch(top_block_cls=signed_multiply_gr):
+    """
+    Non-interactive run of the flowgraph (no throttles, no prompt).
+
+    Runs ``data_a.bin`` and ``data_b.bin`` through the graph until the file
+    sources are exhausted and returns the contents of ``data_prod.bin``.
+    """
+    tb = top_block_cls(throttle=False)
+    tb.run()
+    return np.fromfile('data_prod.bin', dtype=np.float32)
+
+
+def model(a, b, **kwargs):
+    """
+    The flowgraph as a function on arrays: ``a`` and ``b`` go straight into
+    ``blocks.multiply_vff`` (no files, no throttles), see :func:`tb_common.gr_bridge.run`.
+    """
+    from tb_common import gr_bridge
+
+    return gr_bridge.run(lambda: blocks.multiply_vff(1), a, b, **kwargs)
+
+
 if __name__ == '__main__':
-    main()
+    parser = ArgumentParser(description="Signed Multiply Gr")
+    parser.add_argument("--batch", action="store_true",
+                        help="run unthrottled to completion and print the output")
+    if parser.parse_args().batch:
+        print(batch())
+    else:
+        main()
@@ -12,8 +12,6 @@ import sys
 sys.path.insert(1,'/usr/lib/python3/dist-packages') # add gnuradio path
 
 import cocotb
-import cocotb.wavedrom
-from cocotb.binary import BinaryValue
 from cocotb.clock import Clock
 from cocotb.decorators import coroutine
 from cocotb.drivers import BitDriver
@@ -25,22 +23,33 @@ from cocotb.triggers import RisingEdge, Timer, ReadWrite, ReadOnly
 
 import random
 import numpy as np
-from signed_multiply_gr import main
+from tb_common.arith_tests import flowgraph_model, register
+from tb_common.conversions import to_signed
+from tb_common.models import golden_models, multiply_vff, reference
+
+LATENCY = 1  # clock cycles from i_a/i_b to o_prod (registered once)
+
+
+# golden reference model using the GNU Radio flowgraph (see tb_common/arith_tests.py)
+gr_model = flowgraph_model('multiply_vff', 'signed_multiply_gr')
+
 
 def bin2sign(bin_value):
     """
     A simple functional to convert 2's compliment binary value to signed integer
 
-    :param bin_value: 2's compliment binary value
-    """    
-    vec = BinaryValue()
-    vec.signed_integer = bin_value.value
-    return vec.signed_integer
+    :param bin_value: 2's compliment binary value (signal handle), any width
+    """
+    return to_signed(bin_value.value.integer, len(bin_value))
 
-@cocotb.test(timeout_time=200, timeout_unit='ns', skip=False)
-def multiply_gr_test(dut):
+@cocotb.coroutine
+def multiply_gr_test(dut, model=None):
     """
-    Randmized test for o_prod = i_a * i_b (signed multiplication) using GNU Radio
+    Randmized test for o_prod = i_a * i_b (signed multiplication) against the golden model
+
+    :param dut: Veriog module under test
+    :param model: golden model (``numpy``, ``gnuradio`` or ``both``), see
+                  :func:`tb_common.models.reference`
     """
 
     # start the clock
@@ -64,44 +73,39 @@ def multiply_gr_test(dut):
         yield clkedge
         yield ReadWrite() # there seems some "updating" issue with cocotb here! ... without this statement, this test won't pass
 
-        # format A if it is a negative number
-        if (A < 0):
-            i_A = bin2sign(dut.i_a)
-        else:
-            i_A = int(dut.i_a)
-
-        # format B if it is a negative number
-        if (B < 0):
-            i_B = bin2sign(dut.i_b)
-        else:
-            i_B = int(dut.i_b)
-
-        # format the output if it is a negative number
-        if (A*B < 0):
-            o_PROD = bin2sign(dut.o_prod)
-        else:
-            o_PROD = int(dut.o_prod)   
+        # decode the 2's compliment values (no need to check the sign first)
+        i_A = bin2sign(dut.i_a)
+        i_B = bin2sign(dut.i_b)
+        o_PROD = bin2sign(dut.o_prod)
 
         a_lst.append(i_A)
         b_lst.append(i_B)
         prod_lst.append(o_PROD)
     
-    # pass the data to Gnu Radio and get the return data
-    np.array(a_lst, dtype=np.float32).tofile("data_a.bin")
-    np.array(b_lst, dtype=np.float32).tofile("data_b.bin")
-    main() # call the main Gnu Radio flowgraph
-    prod_lst_gr = np.fromfile("data_prod.bin", dtype=np.float32)
-
-    # compare the returned data with verilator output
-    if np.array_equal(prod_lst_gr, np.array(prod_lst)):
+    # get the expected data from the golden model
+    prod_lst_ref = reference(multiply_vff, gr_model, a_lst, b_lst, model)
+
+    # compare the expected data with verilator output
+    if np.array_equal(prod_lst_ref, np.array(prod_lst)):
         dut._log.info("gr_test passed")
     else:
         raise TestFailure("gr_test failed")
 
     # print for convinience
-    print(np.fromfile("data_a.bin", dtype=np.float32))
-    print(np.fromfile("data_b.bin", dtype=np.float32))
-    print(np.fromfile("data_prod.bin", dtype=np.float32))    
+    print(np.array(a_lst, dtype=np.float32))
+    print(np.array(b_lst, dtype=np.float32))
+    print(prod_lst_ref)
+
+
+# Register the golden model tests, one per GOLDEN_MODEL (e.g., multiply_gr_test_numpy_001)
+for model in golden_models():
+    factory = TestFactory(multiply_gr_test)
+    factory.add_option('model', [model])
+    factory.generate_tests(postfix='_' + model)
+
+
+# stream_test, scoreboard_test and the sweep tests (see tb_common/arith_tests.py)
+register(globals(), 'signed_multiply', 'multiply', 'o_prod', signed=True, latency=LATENCY)
 
 
 if __name__ == "__main__":
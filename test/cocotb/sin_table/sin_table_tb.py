@@ -0,0 +1,97 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Module for testing sin_table.v
+
+**Progress:**
+Full phase sweep against tb_common.sintable and a spectral (SFDR/SNR)
+benchmark driven by a streaming phase accumulator.
+"""
+
+import os
+import time
+
+import cocotb
+import numpy as np
+from cocotb.clock import Clock
+from cocotb.result import TestFailure
+from cocotb.triggers import RisingEdge
+
+from tb_common.build_cache import hdl_params
+from tb_common.sintable import sin_table
+from tb_common.spectrum import ideal_sine, metrics, phase_sweep
+from tb_common.streaming import check, stream
+
+
+@cocotb.coroutine
+def sweep(dut, phases):
+    """
+    Stream ``phases`` into ``i_phase`` (one per clock) and return (o_val, samples per second)
+
+    :param dut: Veriog module under test
+    :param phases: array of phases
+    """
+    # start the clock
+    cocotb.fork(Clock(dut.i_clk, 10, units="ns").start())
+    clkedge = RisingEdge(dut.i_clk)
+
+    # reset, then enable
+    dut.i_aux <= 0
+    dut.i_phase <= 0
+    dut.i_ce <= 0
+    dut.i_reset <= 1
+    yield clkedge
+    dut.i_reset <= 0
+    dut.i_ce <= 1
+
+    start = time.time()
+    val = yield stream(dut.i_clk, [dut.i_phase], [phases], dut.o_val, signed=True)
+    rate = len(phases) / max(time.time() - start, 1e-9)
+    return val, rate
+
+
+@cocotb.test(skip=False)
+def table_test(dut):
+    """
+    Read every entry of the table once and compare with tb_common.sintable
+
+    :param dut: Veriog module under test
+    """
+    params = hdl_params(PW=17, OW=13)
+    expected = sin_table(params["PW"], params["OW"])
+    val, rate = yield sweep(dut, np.arange(len(expected)))
+    dut._log.info("%d samples at %.0f samples/s" % (len(expected), rate))
+    check(dut, "table_test", expected, val)
+
+
+@cocotb.test(skip=False)
+def spectrum_test(dut, n=None, cycles=None):
+    """
+    Coherent sine record from a phase accumulator: check it against
+    tb_common.sintable and report SFDR/SNR (vs. the FFT noise floor and vs. the
+    ideal sine) and the simulation speed
+
+    :param dut: Veriog module under test
+    :param n: record length, a power of two (``SPECTRUM_SAMPLES``, 4096 by default)
+    :param cycles: sine periods in the record, odd (``SPECTRUM_CYCLES``, 127 by default)
+    """
+    params = hdl_params(PW=17, OW=13)
+    PW, OW = params["PW"], params["OW"]
+    n = n or int(os.environ.get("SPECTRUM_SAMPLES", 4096))
+    cycles = cycles or int(os.environ.get("SPECTRUM_CYCLES", 127))
+
+    phases = phase_sweep(PW, n, cycles)
+    val, rate = yield sweep(dut, phases)
+    check(dut, "spectrum_test", sin_table(PW, OW)[phases], val, phases)
+
+    m = metrics(val, cycles, ideal_sine(PW, phases, (1 << (OW - 1)) - 1))
+    dut._log.info("PW=%d OW=%d, %d samples (%d cycles): SFDR %.2f dB, SNR %.2f dB "
+                  "(ENOB %.2f), SNR vs. ideal sine %.2f dB, %.0f samples/s"
+                  % (PW, OW, n, cycles, m["sfdr_db"], m["snr_db"], m["enob"],
+                     m["error_snr_db"], rate))
+
+    # optional quality gate, e.g., make SFDR_MIN=80
+    sfdr_min = os.environ.get("SFDR_MIN")
+    if sfdr_min is not None and m["sfdr_db"] < float(sfdr_min):
+        raise TestFailure("SFDR %.2f dB below %s dB" % (m["sfdr_db"], sfdr_min))
@@ -0,0 +1,9 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Helpers shared by all the cocotb testbenches (golden models, drivers, monitors, ...)
+
+The testbench ``Makefile`` puts ``test/cocotb`` on ``PYTHONPATH`` so that this
+package can be imported from any testbench directory.
+"""
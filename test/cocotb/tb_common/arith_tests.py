@@ -0,0 +1,209 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Streaming, scoreboard and width sweep tests shared by the adders and multipliers.
+
+The testbenches differ only in the operation, the signedness and the name of
+the output, so :func:`register` generates the tests from those and adds them
+to the namespace of the testbench module, where cocotb looks for them::
+
+    register(globals(), "signed_adder", "add", "o_sum", signed=True)
+
+adds ``stream_test``, ``scoreboard_test`` and ``sweep_test_001`` ..
+``sweep_test_003`` (one per stimulus of :data:`SWEEPS`, named as a
+``TestFactory`` would). The DUT-specific tests (directed ones, the GNU Radio
+cross-check) stay in the testbench; :func:`flowgraph_model` gives them the
+flowgraph of the DUT as a golden model.
+"""
+
+import importlib
+import operator
+import os
+
+import cocotb
+import numpy as np
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge
+
+from tb_common import gr_server
+from tb_common.conversions import as_words
+from tb_common.coverage import Coverage, arith_bins
+from tb_common.scoreboard import checked_stream
+from tb_common.stimulus import Stimulus, test_seed
+from tb_common.streaming import check, stream, sweep_words
+from tb_common.trace import window_trace
+
+# operation -> (symbol, name, exact model)
+OPS = {
+    "add": ("+", "addition", operator.add),
+    "multiply": ("*", "multiplication", operator.mul),
+}
+
+SWEEPS = ("random", "boundary", "exhaustive")  # stimuli of the sweep tests, in order
+
+
+def flowgraph_model(block, flowgraph):
+    """
+    Golden model running the GNU Radio flowgraph of a testbench, through the
+    model server if one is running (see ``tb_common/gr_server.py``)
+
+    :param block: block of the model server doing the same, e.g., ``add_vff``
+    :param flowgraph: module of the flowgraph, e.g., ``signed_adder_gr``
+    """
+    def gr_model(a, b):
+        if gr_server.address():
+            return gr_server.run(block, a, b)
+        # gnuradio gets imported only if this model is selected
+        return importlib.import_module(flowgraph).model(a, b)
+
+    gr_model.__doc__ = """
+    Golden reference model using the GNU Radio flowgraph (%s.py)
+
+    :param a: first input vector
+    :param b: second input vector
+    """ % flowgraph
+    return gr_model
+
+
+def register(namespace, name, op, output, signed, latency=1, model=None):
+    """
+    Add the streaming, scoreboard and sweep tests of an ``i_a``/``i_b`` core to
+    a testbench module
+
+    :param namespace: ``globals()`` of the testbench module
+    :param name: name of the core (of its coverage group)
+    :param op: ``add`` or ``multiply``
+    :param output: name of the output signal, e.g., ``o_sum``
+    :param signed: two's complement inputs and output if True
+    :param latency: clock cycles from i_a/i_b to the output
+    :param model: vectorized golden model of the inputs (widened to the output
+                  width, see :func:`tb_common.conversions.as_words`), the exact
+                  operation by default
+    """
+    symbol, operation, exact = OPS[op]
+    model = model or exact
+    formula = "%s = i_a %s i_b (%s %s)" % (output, symbol, "signed" if signed else "unsigned",
+                                            operation)
+    module = namespace["__name__"]
+
+    def coverage(dut):
+        return Coverage(name, arith_bins(op, len(dut.i_a), len(dut.i_b), signed=signed))
+
+    def expected(dut, A, B):
+        width = len(getattr(dut, output))
+        return model(as_words(A, width), as_words(B, width))
+
+    def stream_test(dut, n=None):
+        n = n or int(os.environ.get("STREAM_SAMPLES", 1000))
+
+        # start the clock
+        cocotb.fork(Clock(dut.i_clk, 10, units="ns").start())
+        clkedge = RisingEdge(dut.i_clk)
+
+        # constrained-random input data (replayable with RANDOM_SEED, see tb_common/stimulus.py)
+        A, B = Stimulus(test_seed("stream_test"), [len(dut.i_a), len(dut.i_b)], signed=signed)(n)
+
+        yield clkedge  # synchronize ourselves with the clock
+
+        # stream the data through the DUT and compare with the reference model
+        out = yield stream(dut.i_clk, [dut.i_a, dut.i_b], [A, B], getattr(dut, output), signed=signed)
+        cov = coverage(dut)
+        cov.sample(A, B, out)
+        cov.report(dut._log)
+        cov.save()
+        check(dut, "stream_test", expected(dut, A, B), out, A, B)
+
+    def scoreboard_test(dut, n=None):
+        n = n or int(os.environ.get("SCOREBOARD_SAMPLES", 100000))
+
+        # start the clock
+        cocotb.fork(Clock(dut.i_clk, 10, units="ns").start())
+        clkedge = RisingEdge(dut.i_clk)
+
+        # constrained-random input data generated chunk by chunk (replayable with
+        # RANDOM_SEED, see tb_common/stimulus.py)
+        stimulus = Stimulus(test_seed("scoreboard_test"), [len(dut.i_a), len(dut.i_b)], signed=signed)
+
+        yield clkedge  # synchronize ourselves with the clock
+
+        cov = coverage(dut)
+        # waveforms around the first mismatches only (TRACE_WINDOW cycles before, 0 for none)
+        waves = window_trace("scoreboard_test")
+        sb = yield checked_stream(dut, dut.i_clk, [dut.i_a, dut.i_b], getattr(dut, output), model,
+                                  stimulus, n, latency=latency, signed=signed, coverage=cov,
+                                  until_covered=bool(int(os.environ.get("UNTIL_COVERED", 0))),
+                                  trace=waves)
+        cov.report(dut._log)
+        cov.save()
+        raise sb.result
+
+    @cocotb.coroutine
+    def sweep_test(dut, stimulus="random", n=None):
+        n = n or int(os.environ.get("STREAM_SAMPLES", 1000))
+        awidth, bwidth = len(dut.i_a), len(dut.i_b)
+        if stimulus == "exhaustive" and (1 << (awidth + bwidth)) > int(os.environ.get("EXHAUSTIVE_LIMIT", 1 << 20)):
+            dut._log.warning("exhaustive test skipped: %d x %d bit inputs, raise EXHAUSTIVE_LIMIT to run it"
+                             % (awidth, bwidth))
+            return
+
+        # start the clock
+        cocotb.fork(Clock(dut.i_clk, 10, units="ns").start())
+        clkedge = RisingEdge(dut.i_clk)
+
+        # input data for the widths of this build
+        rng = np.random.default_rng(test_seed("sweep_test_%s" % stimulus))
+        A, B = sweep_words(rng, stimulus, awidth, bwidth, n, signed=signed)
+
+        yield clkedge  # synchronize ourselves with the clock
+
+        # stream the data through the DUT and compare with the reference model
+        out = yield stream(dut.i_clk, [dut.i_a, dut.i_b], [A, B], getattr(dut, output), signed=signed)
+        check(dut, "sweep_test (%s, AWIDTH=%d, BWIDTH=%d)" % (stimulus, awidth, bwidth),
+              expected(dut, A, B), out, A, B)
+
+    stream_test.__doc__ = """
+    Randomized streaming test for %s over the full input range
+
+    One sample per clock, checked in bulk at the end.
+
+    :param dut: Veriog module under test
+    :param n: number of samples (``STREAM_SAMPLES`` environment variable, 1000 by default)
+    """ % formula
+    scoreboard_test.__doc__ = """
+    Long randomized run for %s, checked in constant memory by the streaming
+    scoreboard (latency %d)
+
+    With ``UNTIL_COVERED=1`` the run ends as soon as functional coverage closes.
+
+    :param dut: Veriog module under test
+    :param n: number of samples (``SCOREBOARD_SAMPLES`` environment variable, 100000 by default)
+    """ % (formula, latency)
+    for test in (stream_test, scoreboard_test):
+        test.__module__ = module
+        namespace[test.__name__] = cocotb.test(skip=False)(test)
+
+    # the sweep tests, one per stimulus, like TestFactory(sweep_test) would generate them
+    for index, stimulus in enumerate(SWEEPS):
+        test_name = "sweep_test_%03d" % (index + 1)
+        namespace[test_name] = _sweep(test_name, module, formula, sweep_test, stimulus)
+
+
+def _sweep(name, module, formula, sweep_test, stimulus):
+    def test(dut):
+        yield sweep_test(dut, stimulus)
+
+    test.__name__ = name
+    test.__module__ = module
+    test.__doc__ = """
+    Full-range random, boundary value or exhaustive test of %s for the widths
+    the simulator was built with, i.e., ``make PARAMS="AWIDTH=8 BWIDTH=8"``; see
+    the ``--params`` option of ``run_regression.py`` to run many widths concurrently
+
+    The exhaustive test streams every (i_a, i_b) pair, one per clock, and is
+    only run if there are at most ``EXHAUSTIVE_LIMIT`` pairs (2^20 by default).
+    Random samples: ``STREAM_SAMPLES`` (1000 by default).
+
+    stimulus: %r
+    """ % (formula, stimulus)
+    return cocotb.test(skip=False)(test)
@@ -0,0 +1,162 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Verilator build cache for the cocotb testbenches.
+
+Instead of compiling every file of ``hdl/primitives`` in every testbench
+directory, the testbench Makefiles ask this script for
+
+* ``sources``: the files ``TOPLEVEL`` really depends on (the file defining it
+  plus, recursively, the files of the modules it instantiates), and
+* ``sim-build``: a build directory keyed on the contents of those files, the
+  parameters (``AWIDTH=8 BWIDTH=8 ...``), the tracing option and the tool
+  versions, shared by all the testbench directories and all the runs.
+
+So a rerun after editing only a python testbench (or any unrelated HDL file)
+reuses the compiled simulator. The script only uses the standard library and
+is called directly from make::
+
+    python3 build_cache.py sources signed_adder ../../../hdl
+    python3 build_cache.py sim-build signed_adder ../../../hdl AWIDTH=8 BWIDTH=8
+
+The cache lives in ``$DSP_BB_BUILD_CACHE`` (``~/.cache/dsp_bb/verilator`` by default).
+"""
+
+import hashlib
+import os
+import re
+import subprocess
+import sys
+
+CACHE_DIR = os.environ.get("DSP_BB_BUILD_CACHE",
+                           os.path.join(os.path.expanduser("~"), ".cache", "dsp_bb", "verilator"))
+
+_MODULE = re.compile(r"^\s*module\s+(\w+)", re.M)
+_INSTANCE = re.compile(r"^\s*(\w+)\s*(?:#\s*\(.*?\)\s*)?\w+\s*\(", re.M | re.S)
+_INCLUDE = re.compile(r'^\s*`include\s+"([^"]+)"', re.M)
+_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+_KEYWORDS = {"module", "always", "assign", "begin", "end", "if", "else", "case", "for",
+             "initial", "function", "task", "generate", "wire", "reg", "input", "output",
+             "localparam", "parameter", "assert", "assume", "cover", "while", "repeat"}
+
+
+def _strip_comments(text):
+    return _COMMENT.sub("", text)
+
+
+def index(hdl_dir):
+    """
+    Map every module name found under ``hdl_dir`` to the file defining it
+    """
+    modules = {}
+    for root, dirs, files in os.walk(hdl_dir):
+        dirs.sort()  # deterministic: the shallowest, first found definition wins
+        for name in sorted(files):
+            if name.endswith((".v", ".sv")):
+                path = os.path.join(root, name)
+                with open(path, errors="replace") as f:
+                    for module in _MODULE.findall(_strip_comments(f.read())):
+                        modules.setdefault(module, os.path.realpath(path))
+    return modules
+
+
+def dependencies(toplevel, hdl_dir):
+    """
+    Files needed to build ``toplevel``: (module files in dependency order, included files)
+    """
+    modules = index(hdl_dir)
+    if toplevel not in modules:
+        raise SystemExit("build_cache: module %r not found under %s" % (toplevel, hdl_dir))
+
+    sources, includes = [], []
+    todo = [modules[toplevel]]
+    while todo:
+        path = todo.pop()
+        if path in sources:
+            continue
+        sources.append(path)
+        with open(path, errors="replace") as f:
+            text = _strip_comments(f.read())
+        for inc in _INCLUDE.findall(text):
+            for base in (os.path.dirname(path), hdl_dir):
+                candidate = os.path.realpath(os.path.join(base, inc))
+                if os.path.isfile(candidate) and candidate not in includes:
+                    includes.append(candidate)
+                    break
+        for name in _INSTANCE.findall(text):
+            if name not in _KEYWORDS and name in modules:
+                todo.append(modules[name])
+    return sources, includes
+
+
+def _tool_version(cmd):
+    try:
+        return subprocess.check_output(cmd, stderr=subprocess.STDOUT).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def key(toplevel, hdl_dir, params=()):
+    """
+    Hash of everything the compiled simulator depends on
+    """
+    sources, includes = dependencies(toplevel, hdl_dir)
+    h = hashlib.sha256()
+    h.update(toplevel.encode())
+    for path in sources + includes:
+        h.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    for param in sorted(params):
+        h.update(param.encode())
+    h.update(_tool_version(["verilator", "--version"]).encode())
+    h.update(_tool_version(["cocotb-config", "--version"]).encode())
+    return h.hexdigest()[:16]
+
+
+def sim_build(toplevel, hdl_dir, params=()):
+    """
+    Cached build directory for ``toplevel`` with ``params``
+
+    If it already holds a complete build, its make targets are touched so that
+    make does not rebuild just because a source file got a newer timestamp (the
+    contents are what the key is made of).
+    """
+    path = os.path.join(CACHE_DIR, "%s-%s" % (toplevel, key(toplevel, hdl_dir, params)))
+    os.makedirs(path, exist_ok=True)
+    if os.path.isfile(os.path.join(path, "Vtop")):
+        for target in ("Vtop.mk", "Vtop"):
+            if os.path.exists(os.path.join(path, target)):
+                os.utime(os.path.join(path, target))
+    return path
+
+
+def hdl_params(**defaults):
+    """
+    HDL parameters of the running simulator, from the ``PARAMS`` environment
+    variable exported by the Makefile (e.g., ``Q=15 N=32``), as integers
+
+    :param defaults: values of the parameters not given in ``PARAMS``
+    """
+    params = dict(defaults)
+    for param in os.environ.get("PARAMS", "").split():
+        name, value = param.split("=", 1)
+        params[name] = int(value, 0)
+    return params
+
+
+def main(argv):
+    if len(argv) < 3 or argv[0] not in ("sources", "sim-build"):
+        print("usage: build_cache.py {sources|sim-build} TOPLEVEL HDL_DIR [PARAM=VALUE ...]")
+        return 2
+    command, toplevel, hdl_dir, params = argv[0], argv[1], argv[2], argv[3:]
+    if command == "sources":
+        print(" ".join(dependencies(toplevel, hdl_dir)[0]))
+    else:
+        print(sim_build(toplevel, hdl_dir, params))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
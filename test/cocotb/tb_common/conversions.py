@@ -0,0 +1,112 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Width-aware two's complement conversions for raw integers and whole NumPy arrays.
+
+These replace the ``BinaryValue`` round trip (``bin2sign``), so decoding the
+captured words of a batch is one vectorized call. Arrays of up to 63 bit words
+are processed as ``int64``; wider words fall back to python integers (``object``
+arrays) so any width works; ``python3 -m tb_common.conversions`` checks the
+conversions around these limits.
+"""
+
+import numpy as np
+
+
+def word_dtype(width):
+    """
+    Smallest dtype holding the raw (unsigned) ``width`` bit words of a port:
+    ``int64`` up to 63 bits, ``uint64`` at 64 bits, python integers above
+
+    :param width: word width in bits
+    """
+    if width <= 63:
+        return np.dtype(np.int64)
+    if width == 64:
+        return np.dtype(np.uint64)
+    return np.dtype(object)
+
+
+def as_words(x, width):
+    """
+    ``x`` as an array able to hold ``width`` bit words plus a sign (``int64``
+    up to 63 bits, python integers above), e.g., ``as_words(A, awidth + bwidth) * B``
+    for an exact product
+
+    :param x: integer or array of integers
+    :param width: word width in bits
+    """
+    if width <= 63:
+        return np.asarray(x, dtype=np.int64)
+    return np.asarray(x, dtype=object)
+
+
+def to_signed(x, width):
+    """
+    Interpret the raw ``width`` bit word(s) ``x`` as two's complement
+
+    :param x: raw unsigned word (python int) or array of words
+    :param width: word width in bits
+    """
+    if isinstance(x, (int, np.integer)):
+        x = int(x) & ((1 << width) - 1)
+        return x - (1 << width) if x >> (width - 1) else x
+    # flip the sign bit and subtract its weight: no 2^width constant, so a
+    # 63 bit word does not overflow int64
+    sign = 1 << (width - 1)
+    x = as_words(x, width) & ((1 << width) - 1)
+    return (x ^ sign) - sign
+
+
+def to_unsigned(x, width):
+    """
+    Raw ``width`` bit word(s) of the (signed or unsigned) integer(s) ``x``,
+    i.e., what has to be driven into a ``width`` bit port
+
+    :param x: integer or array of integers
+    :param width: word width in bits
+    """
+    if isinstance(x, (int, np.integer)):
+        return int(x) & ((1 << width) - 1)
+    return as_words(x, width) & ((1 << width) - 1)
+
+
+def out_width(op, awidth, bwidth):
+    """
+    Output width (``OUTWID``) of the arithmetic primitives, as computed in
+    ``signed_adder.v``/``unsigned_adder.v`` and ``signed_multiply.v``/``unsigned_multiply.v``
+
+    :param op: ``add`` or ``multiply``
+    :param awidth: ``AWIDTH`` parameter
+    :param bwidth: ``BWIDTH`` parameter
+    """
+    if op == "add":
+        return max(awidth, bwidth) + 1
+    if op == "multiply":
+        return awidth + bwidth
+    raise ValueError("unknown operation %r" % op)
+
+
+def _check(width):
+    """
+    Round trip of the extreme words of a ``width`` bit port, scalar and array
+    """
+    low, high = -(1 << (width - 1)), (1 << (width - 1)) - 1
+    values = sorted(v for v in {low, low + 1, -1, 0, 1, high - 1, high} if low <= v <= high)
+    words = [v & ((1 << width) - 1) for v in values]
+    assert [to_unsigned(v, width) for v in values] == words, width
+    assert [to_signed(w, width) for w in words] == values, width
+    assert [int(w) for w in to_unsigned(np.array(values, dtype=object), width)] == words, width
+    assert [int(v) for v in to_signed(np.array(words, dtype=object), width)] == values, width
+    if width <= 63:
+        assert to_signed(np.array(words, dtype=np.int64), width).tolist() == values, width
+        assert to_unsigned(np.array(values, dtype=np.int64), width).tolist() == words, width
+    if width <= 64:
+        assert [int(v) for v in to_signed(np.array(words, dtype=np.uint64), width)] == values, width
+
+
+if __name__ == "__main__":
+    for w in (1, 2, 8, 32, 62, 63, 64, 65, 128):
+        _check(w)
+    print("conversions OK")
@@ -0,0 +1,230 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Functional coverage of the primitives' requirements, counted in bulk.
+
+A coverage group is a set of named bins, each a vectorized predicate of the
+captured arrays (operands and result). :meth:`Coverage.sample` evaluates all
+of them on a whole batch and adds the hits to one ``uint64`` counter per bin,
+so a run of any length costs a few NumPy calls per batch and a handful of
+integers of memory::
+
+    cov = Coverage("signed_multiply", arith_bins("multiply", 8, 8, signed=True))
+    cov.sample(A, B, prod)   # decoded arrays
+    cov.covered              # every bin hit at least ``goal`` times
+    cov.save()               # merged into COVERAGE_FILE (next to results.xml)
+
+The counters of the tests of one run are added up in its coverage file
+(``run_regression.py`` and ``run_seeds.py`` remove it before every run), and
+the files of separate runs are merged explicitly with :func:`merge` (see
+``run_seeds.py --until-covered``), so a regression can end as soon as
+coverage closes.
+"""
+
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from tb_common.conversions import as_words
+
+
+def coverage_file():
+    """
+    Coverage file of this run: ``COVERAGE_FILE`` environment variable, else
+    ``coverage.json`` next to the results file (``COCOTB_RESULTS_FILE``)
+    """
+    if "COVERAGE_FILE" in os.environ:
+        return os.environ["COVERAGE_FILE"]
+    results = os.environ.get("COCOTB_RESULTS_FILE", "results.xml")
+    return os.path.join(os.path.dirname(results), "coverage.json")
+
+
+class Coverage(object):
+    """
+    Coverage group with one counter per bin
+
+    :param name: group name (e.g., the module under test)
+    :param bins: ordered dict {bin name: function of the sampled arrays
+                 returning a boolean array}
+    :param goal: hits for a bin to be covered
+    """
+    def __init__(self, name, bins, goal=1):
+        self.name = name
+        self.bins = OrderedDict(bins)
+        self.goal = goal
+        self.counts = np.zeros(len(self.bins), dtype=np.uint64)
+        self.samples = 0
+
+    def sample(self, *arrays):
+        """
+        Count the hits of every bin in a batch of samples
+        """
+        hits = [np.count_nonzero(f(*arrays)) for f in self.bins.values()]
+        self.counts += np.array(hits, dtype=np.uint64)
+        self.samples += len(arrays[0])
+
+    @property
+    def covered(self):
+        """
+        True if every bin was hit at least ``goal`` times
+        """
+        return bool(np.all(self.counts >= self.goal))
+
+    def holes(self):
+        """
+        Names of the bins hit less than ``goal`` times
+        """
+        return [name for name, count in zip(self.bins, self.counts) if count < self.goal]
+
+    def to_dict(self):
+        """
+        Counters as a JSON-able dictionary
+        """
+        return {"goal": self.goal, "samples": self.samples,
+                "bins": OrderedDict((name, int(c)) for name, c in zip(self.bins, self.counts))}
+
+    def report(self, log):
+        """
+        Log the counters and the holes
+
+        :param log: logger (e.g., ``dut._log``)
+        """
+        log.info("coverage %s: %d of %d bins covered in %d samples"
+                 % (self.name, len(self.bins) - len(self.holes()), len(self.bins), self.samples))
+        for name, count in zip(self.bins, self.counts):
+            log.info("  %-24s %12d%s" % (name, count, "" if count >= self.goal else "  <- hole"))
+
+    def save(self, path=None):
+        """
+        Add the counters to the coverage file ``path`` (:func:`coverage_file` if None)
+        """
+        path = path or coverage_file()
+        groups = load(path) if os.path.exists(path) else OrderedDict()
+        groups[self.name] = _add(groups.get(self.name), self.to_dict())
+        tmp = path + ".part"
+        with open(tmp, "w") as f:
+            json.dump(groups, f, indent=2)
+        os.replace(tmp, path)
+
+
+def _add(a, b):
+    if a is None:
+        return b
+    bins = OrderedDict(a["bins"])
+    for name, count in b["bins"].items():
+        bins[name] = bins.get(name, 0) + count
+    return {"goal": max(a["goal"], b["goal"]), "samples": a["samples"] + b["samples"],
+            "bins": bins}
+
+
+def load(path):
+    """
+    Coverage groups of a coverage file as {group: {"goal", "samples", "bins"}}
+    """
+    with open(path) as f:
+        return json.load(f, object_pairs_hook=OrderedDict)
+
+
+def merge(paths):
+    """
+    Coverage groups of several coverage files (e.g., of parallel runs) added up;
+    missing files are skipped
+    """
+    merged = OrderedDict()
+    for path in paths:
+        if os.path.exists(path):
+            for name, group in load(path).items():
+                merged[name] = _add(merged.get(name), group)
+    return merged
+
+
+def holes(groups):
+    """
+    {group: names of the bins below the goal} of merged coverage groups (empty if closed)
+    """
+    found = OrderedDict()
+    for name, group in groups.items():
+        missing = [b for b, count in group["bins"].items() if count < group["goal"]]
+        if missing:
+            found[name] = missing
+    return found
+
+
+def arith_bins(op, awidth, bwidth, signed=True):
+    """
+    Bins of the arithmetic primitives as functions of the decoded ``(a, b, y)``
+    arrays: sign quadrants (signed only), zero, min and max operands, sign of
+    the result and overflow, i.e., an exact result needing the growth bit(s)
+    of the output (more than ``max(AWIDTH, BWIDTH)`` bits for the adders,
+    ``AWIDTH + BWIDTH - 1`` for the multipliers)
+
+    :param op: ``add`` or ``multiply``
+    :param awidth: ``AWIDTH`` parameter
+    :param bwidth: ``BWIDTH`` parameter
+    :param signed: two's complement operands if True
+    """
+    if op not in ("add", "multiply"):
+        raise ValueError("unknown operation %r" % op)
+    amin, amax = (-(1 << (awidth - 1)), (1 << (awidth - 1)) - 1) if signed else (0, (1 << awidth) - 1)
+    bmin, bmax = (-(1 << (bwidth - 1)), (1 << (bwidth - 1)) - 1) if signed else (0, (1 << bwidth) - 1)
+    width = max(awidth, bwidth) if op == "add" else awidth + bwidth - 1
+    ymin, ymax = (-(1 << (width - 1)), (1 << (width - 1)) - 1) if signed else (0, (1 << width) - 1)
+    exact = np.add if op == "add" else np.multiply
+
+    bins = OrderedDict()
+    if signed:
+        # requirements 1-4 of signed_multiply.v
+        bins["a<0, b<0"] = lambda a, b, y: (a < 0) & (b < 0)
+        bins["a<0, b>0"] = lambda a, b, y: (a < 0) & (b > 0)
+        bins["a>0, b<0"] = lambda a, b, y: (a > 0) & (b < 0)
+        bins["a>0, b>0"] = lambda a, b, y: (a > 0) & (b > 0)
+    bins["a=0"] = lambda a, b, y: a == 0
+    bins["b=0"] = lambda a, b, y: b == 0
+    bins["a=min"] = lambda a, b, y: a == amin
+    bins["a=max"] = lambda a, b, y: a == amax
+    bins["b=min"] = lambda a, b, y: b == bmin
+    bins["b=max"] = lambda a, b, y: b == bmax
+    if signed:
+        bins["y<0"] = lambda a, b, y: y < 0
+    bins["y=0"] = lambda a, b, y: y == 0
+    bins["y>0"] = lambda a, b, y: y > 0
+
+    def overflow(a, b, y):
+        z = exact(as_words(a, awidth + bwidth), b)  # no int64 wrap for 64 bit products
+        return (z < ymin) | (z > ymax)
+
+    bins["overflow"] = overflow
+    return bins
+
+
+def qadd_bins(N=32):
+    """
+    Bins of ``qadd.v`` as functions of the raw sign-magnitude ``(a, b, c)``
+    words: sign combinations, zero and full scale magnitudes, cancellation
+    (opposite signs, equal magnitudes) and magnitude overflow (same signs,
+    sum above full scale)
+
+    :param N: total number of bits
+    """
+    full = (1 << (N - 1)) - 1
+
+    def split(x):
+        x = np.asarray(x, dtype=np.int64)
+        return (x >> (N - 1)) & 1, x & full
+
+    bins = OrderedDict()
+    for sa, sb in ((0, 0), (0, 1), (1, 0), (1, 1)):
+        name = "a%s, b%s" % ("<0" if sa else ">=0", "<0" if sb else ">=0")
+        bins[name] = lambda a, b, c, sa=sa, sb=sb: (split(a)[0] == sa) & (split(b)[0] == sb)
+    bins["|a|=0"] = lambda a, b, c: split(a)[1] == 0
+    bins["|b|=0"] = lambda a, b, c: split(b)[1] == 0
+    bins["|a|=max"] = lambda a, b, c: split(a)[1] == full
+    bins["|b|=max"] = lambda a, b, c: split(b)[1] == full
+    bins["cancellation"] = lambda a, b, c: ((split(a)[0] != split(b)[0]) &
+                                            (split(a)[1] == split(b)[1]))
+    bins["overflow"] = lambda a, b, c: ((split(a)[0] == split(b)[0]) &
+                                        (split(a)[1] + split(b)[1] > full))
+    return bins
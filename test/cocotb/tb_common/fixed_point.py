@@ -0,0 +1,118 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Bit-accurate, vectorized models of the fixed point cores ``qadd.v`` and ``qmults.v``.
+
+Both cores use the same ``N`` bit sign-magnitude Q format: bit ``N-1`` is the
+sign, bits ``N-2:0`` the magnitude with ``Q`` fractional bits. All the
+functions work on whole arrays of raw words (python ints for ``N`` > 63 are
+not supported, the cores default to ``N = 32``).
+"""
+
+import numpy as np
+
+
+def _split(words, N):
+    words = np.asarray(words, dtype=np.int64)
+    return (words >> (N - 1)) & 1, words & ((1 << (N - 1)) - 1)
+
+
+def to_q(x, Q=15, N=32):
+    """
+    Encode real number(s) ``x`` as sign-magnitude Q format words (magnitude
+    truncated towards zero)
+
+    :param x: real number or array
+    :param Q: number of fractional bits
+    :param N: total number of bits
+    """
+    x = np.asarray(x, dtype=np.float64)
+    mag = np.floor(np.abs(x) * (1 << Q)).astype(np.int64)
+    if np.any(mag >> (N - 1)):
+        raise ValueError("value out of range for Q%d.%d" % (N - 1 - Q, Q))
+    return np.where(x < 0, (1 << (N - 1)) | mag, mag)
+
+
+def from_q(words, Q=15, N=32):
+    """
+    Decode sign-magnitude Q format word(s) to real numbers
+
+    :param words: raw word or array of words
+    :param Q: number of fractional bits
+    :param N: total number of bits
+    """
+    sign, mag = _split(words, N)
+    return np.where(sign == 1, -1.0, 1.0) * mag / float(1 << Q)
+
+
+def qadd(a, b, Q=15, N=32, c0=0):
+    """
+    Output sequence of ``qadd`` for the input sequences ``a`` and ``b`` (one
+    pair per clock); element ``i`` is ``c`` after the ``i``-th rising edge
+
+    Reproduces the core exactly, including
+
+    * the magnitude sum truncated to ``N-1`` bits (no overflow detection), and
+    * the sign of a mixed-sign result when the positive operand wins (``a -ve``
+      branch) or ties/loses (``a +ve`` branch): the core tests the magnitude of
+      the *previous* ``c`` (non-blocking read), so it depends on the history.
+
+    :param a: array of raw addend words
+    :param b: array of raw addend words
+    :param Q: number of fractional bits (the sum does not depend on it)
+    :param N: total number of bits
+    :param c0: value of ``c`` before the first clock edge
+    """
+    mask = (1 << (N - 1)) - 1
+    sa, ma = _split(a, N)
+    sb, mb = _split(b, N)
+    a_bigger = ma > mb
+
+    mag = np.where(sa == sb, (ma + mb) & mask, np.where(a_bigger, ma - mb, mb - ma))
+
+    # magnitude of c before each edge: the previous output (or c0)
+    prev_mag = np.empty_like(mag)
+    prev_mag[:1] = int(c0) & mask
+    prev_mag[1:] = mag[:-1]
+    history_sign = (prev_mag != 0).astype(np.int64)
+
+    sign = np.where(sa == sb, sa,
+                    np.where(sa == 0,
+                             np.where(a_bigger, 0, history_sign),    # a +ve, b -ve
+                             np.where(a_bigger, history_sign, 0)))   # a -ve, b +ve
+    return (sign << (N - 1)) | mag
+
+
+def qmults(multiplicand, multiplier, Q=15, N=32):
+    """
+    Result and overflow flag of ``qmults`` for each (multiplicand, multiplier) pair,
+    as presented on ``o_result_out``/``o_overflow`` once ``o_complete`` rises
+
+    The serial shift-and-add loop sums the full ``2N-2`` bit product of the
+    magnitudes; the result keeps ``product[N-2+Q:Q]`` (truncation) with the
+    XOR of the signs (so ``-0`` is possible) and the overflow flag is set if
+    any product bit above ``N-2+Q`` is set.
+
+    :param multiplicand: array of raw words
+    :param multiplier: array of raw words
+    :param Q: number of fractional bits
+    :param N: total number of bits (at most 32, the product must fit in 63 bits)
+    :return: (result words, overflow flags)
+    """
+    if 2 * N - 1 > 63:
+        raise ValueError("N=%d: product does not fit in int64" % N)
+    mask = (1 << (N - 1)) - 1
+    sa, ma = _split(multiplicand, N)
+    sb, mb = _split(multiplier, N)
+    product = ma * mb
+    result = ((sa ^ sb) << (N - 1)) | ((product >> Q) & mask)
+    overflow = (product >> (N - 1 + Q)) > 0
+    return result, overflow
+
+
+def qmults_latency(N=32):
+    """
+    Clock edges from the edge sampling ``i_start`` to the edge raising ``o_complete``
+    """
+    return N + 1
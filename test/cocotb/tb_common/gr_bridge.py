@@ -0,0 +1,116 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Bridge between NumPy buffers and the GNU Radio models (``*_gr.py``).
+
+Instead of ``tofile`` -> ``file_source`` -> ``file_sink`` -> ``fromfile``, the
+input arrays are fed to the processing block with ``vector_source_f`` and the
+result is collected with ``vector_sink_f``, so no temporary files are needed.
+
+If the data is larger than ``max_in_memory`` bytes, the graph streams from and
+to memory-mapped files instead (``np.memmap`` inputs are used in place, without
+any copy) and the output is returned as a read-only ``np.memmap``.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+from gnuradio import blocks
+from gnuradio import gr
+
+MAX_IN_MEMORY = 1 << 28  # 256 MiB
+
+
+def _as_float32(x):
+    return np.ascontiguousarray(x, dtype=np.float32)
+
+
+def _file_name(x, workdir, temp_files):
+    """
+    Get a file holding the float32 samples of ``x`` (the backing file if ``x`` is
+    already a suitable ``np.memmap``, otherwise a new temporary file)
+    """
+    if (isinstance(x, np.memmap) and x.dtype == np.float32 and x.offset == 0
+            and x.flags.c_contiguous and x.filename is not None
+            and os.path.getsize(x.filename) == x.nbytes):
+        return x.filename
+
+    fd, name = tempfile.mkstemp(suffix=".bin", dir=workdir)
+    with os.fdopen(fd, "wb") as f:
+        _as_float32(x).tofile(f)
+    temp_files.append(name)
+    return name
+
+
+class VectorGraph(object):
+    """
+    Flowgraph ``vector_source_f`` (one per input) -> processing block -> ``vector_sink_f``.
+
+    The graph is built once and can be run again and again on new data, which
+    is what the persistent model server (:mod:`tb_common.gr_server`) relies on.
+
+    :param make_block: callable returning the processing block
+    :param n_inputs: number of input ports of the block
+    """
+    def __init__(self, make_block, n_inputs):
+        self.tb = gr.top_block()
+        self.block = make_block()
+        self.sources = [blocks.vector_source_f([], False) for _ in range(n_inputs)]
+        self.sink = blocks.vector_sink_f()
+        for port, src in enumerate(self.sources):
+            self.tb.connect((src, 0), (self.block, port))
+        self.tb.connect((self.block, 0), (self.sink, 0))
+
+    def __call__(self, *inputs):
+        """
+        Run the graph on ``inputs`` (one array per input port) and return the output
+        """
+        for src, x in zip(self.sources, inputs):
+            # SWIG wants python floats, tolist() is the fastest way to get them
+            src.set_data(_as_float32(x).tolist(), [])  # also rewinds the source
+        self.sink.reset()
+        self.tb.run()
+        return np.asarray(self.sink.data(), dtype=np.float32)
+
+
+def run(make_block, *inputs, max_in_memory=MAX_IN_MEMORY, workdir=None):
+    """
+    Run ``inputs`` through a GNU Radio processing block and return its output
+
+    :param make_block: callable returning the processing block, e.g.,
+                       ``lambda: blocks.add_vff(1)``
+    :param inputs: one float32 compatible array per input port of the block
+    :param max_in_memory: above this many bytes (all inputs together), stream
+                          through memory-mapped files instead of vectors
+    :param workdir: directory for the memory-mapped files (system default if None)
+    """
+    nbytes = sum(np.asarray(x).size for x in inputs) * gr.sizeof_float
+    in_memory = nbytes <= max_in_memory and not any(
+        isinstance(x, np.memmap) for x in inputs)
+
+    if in_memory:
+        return VectorGraph(make_block, len(inputs))(*inputs)
+
+    tb = gr.top_block()
+    block = make_block()
+    temp_files = []
+    try:
+        for port, x in enumerate(inputs):
+            src = blocks.file_source(gr.sizeof_float, _file_name(x, workdir, temp_files), False)
+            tb.connect((src, 0), (block, port))
+        fd, out_name = tempfile.mkstemp(suffix=".bin", dir=workdir)
+        os.close(fd)
+        temp_files.append(out_name)
+        sink = blocks.file_sink(gr.sizeof_float, out_name, False)
+        sink.set_unbuffered(True)  # everything is on disk once run() returns
+        tb.connect((block, 0), (sink, 0))
+        tb.run()
+        if os.path.getsize(out_name) == 0:
+            return np.zeros(0, dtype=np.float32)
+        # the mapping stays valid after the file is unlinked (POSIX)
+        return np.memmap(out_name, dtype=np.float32, mode="r")
+    finally:
+        for name in temp_files:
+            os.remove(name)
@@ -0,0 +1,209 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Persistent GNU Radio model server shared by all the testbenches of a regression.
+
+Start it once (GNU Radio gets imported only here)::
+
+    python3 -m tb_common.gr_server --workers 4 &
+    export GR_SERVER=$(python3 -m tb_common.gr_server --print-address)
+
+Every worker of the pool keeps its flowgraphs (:class:`tb_common.gr_bridge.VectorGraph`)
+instantiated, so a request costs only the transfer of the samples and a
+``tb.run()``. Clients (any number of simulator processes) connect through a
+local (unix) socket; if ``GR_SERVER`` is not set, the testbenches fall back to
+building the flowgraph locally.
+
+The socket lives in a directory private to the user (``$XDG_RUNTIME_DIR/dsp_bb``,
+else ``~/.cache/dsp_bb``, mode 0700) and the connections are authenticated
+with a random key the server writes next to it (``<socket>.key``, mode 0600)
+or takes from ``GR_SERVER_AUTHKEY`` (hex), so other users can neither reach
+the server nor pose as it.
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import stat
+import sys
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+
+# processing blocks (from gnuradio.blocks) served, all single input vector length
+MODELS = ("add_vff", "multiply_vff")
+
+_graphs = {}  # per worker process: (model name, number of inputs) -> VectorGraph
+_connection = None  # per client process
+
+
+def address():
+    """
+    Address of the running model server (``GR_SERVER`` environment variable),
+    or None if the testbenches should not use a server
+    """
+    return os.environ.get("GR_SERVER") or None
+
+
+def runtime_dir():
+    """
+    Directory of the server socket, private to the user (created if missing)
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "dsp_bb")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.stat(path)
+    if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise RuntimeError("%s must be owned by the user and not accessible to others" % path)
+    return path
+
+
+def default_address():
+    """
+    Default socket path of the model server, in :func:`runtime_dir`
+    """
+    return os.path.join(runtime_dir(), "gr_server")
+
+
+def authkey(addr):
+    """
+    Authentication key of the server at ``addr``: ``GR_SERVER_AUTHKEY``
+    environment variable (hex) or the key file written by the server
+    """
+    if os.environ.get("GR_SERVER_AUTHKEY"):
+        return bytes.fromhex(os.environ["GR_SERVER_AUTHKEY"])
+    with open(addr + ".key", "rb") as f:
+        return f.read()
+
+
+def _remove_stale(addr):
+    """
+    Remove ``addr`` if it is a socket nobody listens on; refuse to touch
+    anything else
+    """
+    try:
+        mode = os.lstat(addr).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise RuntimeError("%s exists and is not a socket, not removing it" % addr)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(addr)
+        except ConnectionRefusedError:
+            os.remove(addr)  # stale socket from a previous run
+            return
+    raise RuntimeError("a model server is already listening on %s" % addr)
+
+
+def _work(name, inputs):
+    """
+    Run one batch in a worker process (graphs are built on first use only)
+    """
+    key = (name, len(inputs))
+    graph = _graphs.get(key)
+    if graph is None:
+        from gnuradio import blocks
+        from tb_common.gr_bridge import VectorGraph
+
+        graph = _graphs[key] = VectorGraph(lambda: getattr(blocks, name)(1), len(inputs))
+    return graph(*inputs)
+
+
+def _handle(conn, pool):
+    """
+    Serve all the requests of one client connection
+    """
+    with conn:
+        while True:
+            try:
+                name, inputs = conn.recv()
+            except EOFError:
+                return
+            if name not in MODELS:
+                conn.send(("error", "unknown model %r, use one of %s" % (name, MODELS)))
+                continue
+            try:
+                conn.send(("ok", pool.apply(_work, (name, inputs))))
+            except Exception as e:  # report to the client, keep serving
+                conn.send(("error", repr(e)))
+
+
+def serve(addr=None, workers=None):
+    """
+    Run the model server until interrupted
+
+    :param addr: unix socket path to listen on (:func:`default_address` if None)
+    :param workers: number of worker processes (number of CPUs if None)
+    """
+    addr = addr or default_address()
+    _remove_stale(addr)
+    key_file = None
+    if os.environ.get("GR_SERVER_AUTHKEY"):
+        key = authkey(addr)
+    else:
+        key, key_file = os.urandom(32), addr + ".key"
+        if os.path.lexists(key_file):
+            os.remove(key_file)  # key of the stale server
+        fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+    pool = multiprocessing.Pool(workers or os.cpu_count())
+    listener = Listener(addr, family="AF_UNIX", authkey=key)
+    print("GNU Radio model server listening on %s" % addr)
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError):
+                continue  # wrong key or a probe (see _remove_stale), keep serving
+            threading.Thread(target=_handle, args=(conn, pool), daemon=True).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        pool.terminate()
+        if key_file:
+            os.remove(key_file)
+
+
+def run(name, *inputs):
+    """
+    Run ``inputs`` through model ``name`` on the server given by :func:`address`
+
+    The connection is opened on first use and kept for the lifetime of the
+    (simulator) process.
+
+    :param name: one of :data:`MODELS`
+    :param inputs: one array per input port of the model
+    """
+    global _connection
+    if _connection is None:
+        addr = address()
+        _connection = Client(addr, family="AF_UNIX", authkey=authkey(addr))
+    _connection.send((name, [np.ascontiguousarray(x, dtype=np.float32) for x in inputs]))
+    status, result = _connection.recv()
+    if status != "ok":
+        raise RuntimeError("GNU Radio model server: %s" % result)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--address", default=address(),
+                        help="unix socket to listen on (default: GR_SERVER or %s)"
+                             % os.path.join("$XDG_RUNTIME_DIR", "dsp_bb", "gr_server"))
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--print-address", action="store_true",
+                        help="print the socket path (for GR_SERVER) and exit")
+    args = parser.parse_args()
+    if args.print_address:
+        print(args.address or default_address())
+        sys.exit(0)
+    sys.exit(serve(args.address, args.workers))
@@ -0,0 +1,142 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Driver/monitor pair for multi-cycle cores with a start/complete handshake (``qmults.v``).
+
+An operation starts on the rising edge where ``complete`` is high and ``start``
+is asserted; its result is valid once ``complete`` rises again. The driver
+keeps ``start`` asserted and puts the next operands on the bus right after
+each launch, so the core runs back-to-back (saturated). Both sides record the
+clock cycle of every launch/completion in preallocated arrays, which gives the
+per-operation latency and the sustained operations per cycle.
+
+Typical use (inside a cocotb test)::
+
+    monitor = HandshakeMonitor(dut.i_clk, dut.o_complete, [dut.o_result_out, dut.o_overflow], n)
+    driver = HandshakeDriver(dut.i_clk, dut.i_start, [dut.i_multiplicand, dut.i_multiplier],
+                             [A, B], monitor)
+    driver.start()
+    yield monitor.start().join()
+    result, overflow = monitor.data
+"""
+
+import cocotb
+import numpy as np
+from cocotb.decorators import coroutine
+from cocotb.triggers import ReadOnly, RisingEdge
+
+
+class HandshakeMonitor(object):
+    """
+    Capture the outputs of a handshake core whenever ``complete`` rises.
+
+    :param clk: reference clock
+    :param complete: "done" signal of the core
+    :param outputs: list of result signals captured on completion
+    :param n: number of operations to capture
+    """
+    def __init__(self, clk, complete, outputs, n):
+        self.clk = clk
+        self.complete = complete
+        self.outputs = outputs
+        self.n = n
+        self.raw = np.zeros((len(outputs), n), dtype=np.int64)
+        self.completed = np.zeros(n, dtype=np.int64)  # cycle of each completion
+        self.cycle = 0  # rising edges seen since start
+        self.ready = 1  # value of complete before the next edge
+
+    @coroutine
+    def _run(self):
+        clkedge = RisingEdge(self.clk)
+        readonly = ReadOnly()
+        self.ready = int(self.complete.value)
+        i = 0
+        while i < self.n:
+            yield clkedge
+            self.cycle += 1
+            yield readonly  # let the registered outputs settle
+            ready = int(self.complete.value)
+            if ready and not self.ready:  # rising complete: a result is available
+                for row, signal in zip(self.raw, self.outputs):
+                    row[i] = signal.value.integer
+                self.completed[i] = self.cycle
+                i += 1
+            self.ready = ready
+
+    def start(self):
+        """
+        Start capturing (returns the forked coroutine)
+        """
+        return cocotb.fork(self._run())
+
+    @property
+    def data(self):
+        """
+        Captured outputs, one array per output signal
+        """
+        return list(self.raw)
+
+
+class HandshakeDriver(object):
+    """
+    Launch one operation per available slot from NumPy arrays of operands.
+
+    :param clk: reference clock
+    :param start: "start" signal of the core
+    :param signals: list of operand signals
+    :param data: list of operand arrays (one per signal, all of the same length)
+    :param monitor: :class:`HandshakeMonitor` of the same core (tells when it is
+                    ready), started in the same time step so both count the same edges
+    """
+    def __init__(self, clk, start, signals, data, monitor):
+        self.clk = clk
+        self.start_signal = start
+        self.signals = signals
+        self.columns = [np.asarray(x, dtype=np.int64).tolist() for x in data]
+        self.monitor = monitor
+        self.launched = np.zeros(len(self.columns[0]), dtype=np.int64)  # cycle of each launch
+
+    def _drive(self, i):
+        for signal, column in zip(self.signals, self.columns):
+            signal <= column[i]
+
+    @coroutine
+    def _run(self):
+        clkedge = RisingEdge(self.clk)
+        n = len(self.launched)
+        monitor = self.monitor
+
+        # first operands, then launch whenever the core is ready before an edge
+        self._drive(0)
+        self.start_signal <= 1
+        i = 0
+        cycle = 0
+        while i < n:
+            yield clkedge
+            cycle += 1
+            if monitor.ready:  # complete as sampled just before this edge
+                self.launched[i] = cycle
+                i += 1
+                if i < n:
+                    self._drive(i)  # operands are sampled only at the launch edge
+                else:
+                    self.start_signal <= 0
+
+    def start(self):
+        """
+        Start driving (returns the forked coroutine)
+        """
+        return cocotb.fork(self._run())
+
+
+def throughput(launched, completed):
+    """
+    (per operation latency in cycles, sustained operations per cycle)
+
+    :param launched: cycle of each launch (:attr:`HandshakeDriver.launched`)
+    :param completed: cycle of each completion (:attr:`HandshakeMonitor.completed`)
+    """
+    latency = completed - launched
+    cycles = completed[-1] - launched[0]
+    return latency, len(completed) / float(cycles) if cycles else float("nan")
@@ -0,0 +1,87 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+In-process (NumPy) golden reference models for the arithmetic primitives.
+
+The GNU Radio flowgraphs (``*_gr.py``) do their math with ``blocks.add_vff`` and
+``blocks.multiply_vff``, i.e., element-wise single precision float operations.
+The functions given here reproduce exactly the same float32 semantics on whole
+arrays, so the checks don't have to pay the flowgraph startup for every test.
+The flowgraph is still available as a cross-check, see :func:`reference`.
+"""
+
+import os
+
+import numpy as np
+
+MODELS = ("numpy", "gnuradio", "both")
+
+
+def add_vff(a, b):
+    """
+    Element-wise float32 addition (same as ``blocks.add_vff(1)``)
+
+    :param a: first input vector
+    :param b: second input vector
+    """
+    return np.add(np.asarray(a, dtype=np.float32),
+                  np.asarray(b, dtype=np.float32),
+                  dtype=np.float32)
+
+
+def multiply_vff(a, b):
+    """
+    Element-wise float32 multiplication (same as ``blocks.multiply_vff(1)``)
+
+    :param a: first input vector
+    :param b: second input vector
+    """
+    return np.multiply(np.asarray(a, dtype=np.float32),
+                       np.asarray(b, dtype=np.float32),
+                       dtype=np.float32)
+
+
+def golden_models():
+    """
+    Golden models selected with the ``GOLDEN_MODEL`` environment variable, a
+    comma-separated list (``numpy`` if not given), e.g., ``make GOLDEN_MODEL=numpy,both``;
+    the testbenches generate one golden model test per model
+    """
+    models = [m.strip() for m in os.environ.get("GOLDEN_MODEL", "numpy").split(",") if m.strip()]
+    for model in models:
+        if model not in MODELS:
+            raise ValueError("unknown golden model %r, use one of %s" % (model, MODELS))
+    return models or ["numpy"]
+
+
+def golden_model():
+    """
+    Default golden model, the first one of :func:`golden_models`
+    """
+    return golden_models()[0]
+
+
+def reference(numpy_model, gr_model, a, b, model=None):
+    """
+    Get the expected output for the input vectors ``a`` and ``b``
+
+    :param numpy_model: in-process model, e.g., :func:`add_vff`
+    :param gr_model: function running the GNU Radio flowgraph on ``a`` and ``b``
+    :param a: first input vector
+    :param b: second input vector
+    :param model: ``numpy``, ``gnuradio`` or ``both`` (numpy model cross-checked
+                  against the flowgraph); :func:`golden_model` if not given
+    """
+    if model is None:
+        model = golden_model()
+    if model not in MODELS:
+        raise ValueError("unknown golden model %r, use one of %s" % (model, MODELS))
+
+    if model == "numpy":
+        return numpy_model(a, b)
+
+    expected = np.asarray(gr_model(a, b), dtype=np.float32)
+    if model == "both" and not np.array_equal(expected, numpy_model(a, b)):
+        raise AssertionError("numpy model does not match the GNU Radio flowgraph")
+    return expected
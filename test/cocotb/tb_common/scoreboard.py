@@ -0,0 +1,224 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Streaming scoreboard for pipelined cores, in constant memory.
+
+After every rising edge the inputs and the output are sampled into ring
+buffers; the output sampled ``latency`` cycles after a set of inputs is its
+result. Every ``batch`` samples the vectorized golden model is called on the
+buffered inputs and compared with the buffered outputs in one go, so nothing
+grows with the length of the run and there is no compare per sample in python
+(unlike ``cocotb.scoreboard.Scoreboard`` with its list of expected values)::
+
+    sb = StreamScoreboard(dut, dut.i_clk, [dut.i_a, dut.i_b], dut.o_sum,
+                          lambda a, b: a + b, latency=1, signed=True)
+    sb.start()            # right after a rising edge, like the drivers
+    ...                   # drive as many samples as you like
+    sb.stop()
+    raise sb.result
+
+The model gets the batches in order, so it may keep state between calls
+(e.g., the history of ``qadd`` or the steps of ``int_clk_div``). Given a
+``coverage`` group (see ``tb_common/coverage.py``), every compared batch of
+inputs and outputs is also counted into its bins.
+:func:`checked_stream` also generates and drives the stimulus chunk by chunk,
+for runs of any length in flat memory, can stop as soon as coverage closes and
+can dump the waveforms around the first mismatches from its ring buffers
+(``tb_common/trace.py``).
+"""
+
+import cocotb
+import numpy as np
+from cocotb.decorators import coroutine
+from cocotb.result import TestFailure, TestSuccess
+from cocotb.triggers import ReadOnly, RisingEdge
+
+from tb_common.conversions import as_words, to_signed, word_dtype
+from tb_common.streaming import StreamDriver
+
+
+class StreamScoreboard(object):
+    """
+    Compare a core against a vectorized model, ``batch`` samples at a time.
+
+    :param dut: Veriog module under test (for logging)
+    :param clk: reference clock
+    :param inputs: list of input signals
+    :param output: output signal
+    :param model: function of the input arrays (one per input signal) returning
+                  the expected output array; the inputs come as python integers
+                  (``object`` arrays) if the output is wider than 63 bits
+    :param latency: clock cycles from the inputs to their output
+    :param signed: decode inputs and output as two's complement if True
+    :param batch: samples compared at a time (memory is ``batch + latency + history`` samples)
+    :param max_report: mismatches reported in detail
+    :param coverage: :class:`tb_common.coverage.Coverage` sampled with the
+                     decoded inputs and outputs of every batch (optional)
+    :param history: compared samples kept in the ring buffers for
+                    :meth:`history_window` (e.g., for the waveforms of a mismatch)
+    """
+    def __init__(self, dut, clk, inputs, output, model, latency=1, signed=False,
+                 batch=4096, max_report=10, coverage=None, history=0):
+        self.dut = dut
+        self.clk = clk
+        self.inputs = inputs
+        self.output = output
+        self.model = model
+        self.latency = latency
+        self.signed = signed
+        self.batch = batch
+        self.max_report = max_report
+        self.coverage = coverage
+        self.history = history
+        self.size = batch + latency + history
+        # ring buffers of raw words, as wide as the signals (see word_dtype)
+        self._in = np.zeros((self.size, len(inputs)), dtype=word_dtype(max(len(s) for s in inputs)))
+        self._out = np.zeros(self.size, dtype=word_dtype(len(output)))
+        self.samples = 0  # samples taken
+        self.compared = 0  # outputs compared
+        self.errors = 0  # outputs mismatched
+        self.mismatches = []  # first max_report (sample, inputs, expected, observed)
+        self.on_mismatch = []  # callbacks, called with the array of failing sample indices
+        self.on_compare = []  # callbacks, called after every compare
+        self._next = latency  # first sample not compared yet (the pipeline fills before it)
+        self._coro = None
+
+    @coroutine
+    def _run(self):
+        clkedge = RisingEdge(self.clk)
+        readonly = ReadOnly()
+        while True:
+            yield readonly  # outputs settled, inputs of the next edge driven
+            self.sample()
+            yield clkedge
+
+    def sample(self):
+        """
+        Record the current inputs and output as the next sample
+        """
+        row = self.samples % self.size
+        self._in[row] = [s.value.integer for s in self.inputs]
+        self._out[row] = self.output.value.integer
+        self.samples += 1
+        if self.samples - self._next >= self.batch:
+            self.compare()
+
+    def _decode(self, raw, signal):
+        return to_signed(raw, len(signal)) if self.signed else raw
+
+    def _operand(self, raw, signal):
+        # decoded input, wide enough for the model to compute the output exactly
+        return as_words(self._decode(raw, signal), len(self.output))
+
+    def compare(self):
+        """
+        Compare all the outputs sampled so far that have not been compared yet
+        """
+        t = np.arange(self._next, self.samples)
+        if not len(t):
+            return
+        rows = (t - self.latency) % self.size
+        inputs = [self._operand(self._in[rows, j], s) for j, s in enumerate(self.inputs)]
+        expected = np.asarray(self.model(*inputs))
+        observed = self._decode(self._out[t % self.size], self.output)
+        bad = np.flatnonzero(expected != observed)
+        self._next = self.samples
+        self.compared += len(t)
+        if self.coverage is not None:
+            self.coverage.sample(*(inputs + [observed]))
+        if bad.size:
+            self.errors += bad.size
+            for i in bad[:self.max_report - len(self.mismatches)]:
+                self.mismatches.append((int(t[i]), [int(x[i]) for x in inputs],
+                                        int(expected[i]), int(observed[i])))
+                self.dut._log.error("sample %d: inputs %s, expected %s, got %s"
+                                    % self.mismatches[-1])
+            for callback in self.on_mismatch:
+                callback(t[bad])
+        for callback in self.on_compare:
+            callback()
+
+    def history_window(self, start, stop):
+        """
+        (sample indices, raw inputs, raw outputs) of the samples ``start .. stop-1``
+        still in the ring buffers, as sampled (the output of a sample belongs to
+        the inputs ``latency`` samples before)
+        """
+        start = max(start, self.samples - self.size, 0)
+        t = np.arange(start, max(start, min(stop, self.samples)))
+        rows = t % self.size
+        return t, self._in[rows], self._out[rows]
+
+    def start(self):
+        """
+        Start sampling (returns the forked coroutine)
+        """
+        self._coro = cocotb.fork(self._run())
+        return self._coro
+
+    def stop(self):
+        """
+        Stop sampling and compare what is left in the buffers
+        """
+        if self._coro is not None:
+            self._coro.kill()
+            self._coro = None
+        self.compare()
+
+    @property
+    def result(self):
+        """
+        ``TestFailure`` if any output mismatched, else ``TestSuccess`` (to be raised)
+        """
+        if self.errors:
+            return TestFailure("%d of %d samples mismatched" % (self.errors, self.compared))
+        self.dut._log.info("scoreboard: %d samples matched" % self.compared)
+        return TestSuccess()
+
+
+@coroutine
+def checked_stream(dut, clk, signals, output, model, stimulus, n, latency=1, signed=False,
+                   chunk=4096, coverage=None, until_covered=False, trace=None):
+    """
+    Drive ``n`` samples, ``chunk`` at a time, through a :class:`StreamScoreboard`
+    and return the stopped scoreboard. Start it right after a rising edge.
+
+    :param dut: Veriog module under test
+    :param clk: reference clock
+    :param signals: list of input signals
+    :param output: output signal
+    :param model: vectorized golden model (see :class:`StreamScoreboard`)
+    :param stimulus: function returning the list of input arrays (one per
+                     signal) for the given number of samples
+    :param n: number of samples
+    :param latency: clock cycles from the inputs to their output
+    :param signed: decode inputs and output as two's complement if True
+    :param chunk: samples generated (and compared) at a time
+    :param coverage: coverage group sampled by the scoreboard (optional)
+    :param until_covered: stop after the first chunk closing ``coverage``
+                          (``n`` is then only the budget)
+    :param trace: :class:`tb_common.trace.MismatchWindow` dumping the cycles
+                  around the mismatches (optional, closed here); the scoreboard
+                  keeps its ``pre + post`` cycles of history
+    """
+    clkedge = RisingEdge(clk)
+    sb = StreamScoreboard(dut, clk, signals, output, model, latency, signed, batch=chunk,
+                          coverage=coverage, history=0 if trace is None else trace.pre + trace.post)
+    if trace is not None:
+        trace.attach(sb)
+    sb.start()
+    for start in range(0, n, chunk):
+        yield StreamDriver(clk, signals, stimulus(min(chunk, n - start))).start().join()
+        yield clkedge  # the last sample of the chunk gets in
+        if until_covered and coverage is not None:
+            sb.compare()
+            if coverage.covered:
+                dut._log.info("coverage closed after %d samples" % sb.samples)
+                break
+    for _ in range(latency):
+        yield clkedge
+    sb.stop()
+    if trace is not None:
+        trace.close()
+    return sb
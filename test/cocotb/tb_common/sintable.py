@@ -0,0 +1,199 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Generator for the look-up table of ``sin_table.v`` (``sintable.hex``).
+
+Entry ``i`` of the ``2^PW`` entry table is
+``trunc((2^(OW-1)-1) * sin(2*pi*i/2^PW))`` as an ``OW`` bit two's complement
+word (the shipped ``PW = 17``, ``OW = 13`` table is reproduced exactly). Only
+the first quarter wave is evaluated, the rest comes from the symmetry of sine,
+and the files are written chunk by chunk with vectorized hex formatting, so
+large tables (``PW = 20`` and more) need neither giant python strings nor
+much memory.
+
+Formats (from the file extension):
+
+* ``.hex``: ``$writememh`` layout, ``@address`` followed by 8 words per line
+* ``.mem``: one word per line
+* ``.bin``: raw little-endian two's complement words (smallest integer type)
+
+Generated tables are cached in ``$DSP_BB_SINTABLE_CACHE``
+(``~/.cache/dsp_bb/sintable`` by default)::
+
+    python3 -m tb_common.sintable --pw 17 --ow 13 sintable.hex
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+CACHE_DIR = os.environ.get("DSP_BB_SINTABLE_CACHE",
+                           os.path.join(os.path.expanduser("~"), ".cache", "dsp_bb", "sintable"))
+VERSION = 1  # bump when the table contents or the file formats change
+FORMATS = ("hex", "mem", "bin")
+
+_HEX = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+
+def quarter_wave(PW=17, OW=13):
+    """
+    Entries ``0 .. 2^(PW-2)`` (both included) of the table
+
+    :param PW: number of bits in the input phase (at least 2)
+    :param OW: number of output bits
+    """
+    if PW < 2:
+        raise ValueError("PW must be at least 2")
+    k = np.arange((1 << (PW - 2)) + 1, dtype=np.float64)
+    return np.trunc(((1 << (OW - 1)) - 1) * np.sin(2 * np.pi * k / (1 << PW))).astype(np.int64)
+
+
+def sin_table(PW=17, OW=13, start=0, stop=None, quarter=None):
+    """
+    Signed table entries ``start .. stop-1`` (the whole table by default)
+
+    :param PW: number of bits in the input phase
+    :param OW: number of output bits
+    :param start: first entry
+    :param stop: one past the last entry (``2^PW`` if None)
+    :param quarter: :func:`quarter_wave` of ``PW``/``OW`` (computed if None)
+    """
+    if quarter is None:
+        quarter = quarter_wave(PW, OW)
+    if stop is None:
+        stop = 1 << PW
+    q = 1 << (PW - 2)
+    i = np.arange(start, stop, dtype=np.int64)
+    k = i & ((2 * q) - 1)                 # position within the half wave
+    values = quarter[np.minimum(k, 2 * q - k)]
+    return np.where(i >= 2 * q, -values, values)
+
+
+def _hex_digits(x, digits):
+    """
+    (len(x), digits) array of lowercase hex characters of the unsigned words ``x``
+    """
+    shifts = 4 * np.arange(digits - 1, -1, -1, dtype=np.uint64)
+    return _HEX[(x.astype(np.uint64)[:, None] >> shifts) & np.uint64(0xF)]
+
+
+def _hex_lines(words, first_address, digits, per_line=8):
+    """
+    ``$writememh`` style lines (bytes) for the raw words (len(words) % per_line == 0)
+    """
+    rows = len(words) // per_line
+    line = np.full((rows, 10 + per_line * (digits + 1) + 1), ord(" "), dtype=np.uint8)
+    line[:, 0] = ord("@")
+    addresses = first_address + per_line * np.arange(rows, dtype=np.uint64)
+    line[:, 1:9] = _hex_digits(addresses, 8)
+    block = np.full((rows, per_line, digits + 1), ord(" "), dtype=np.uint8)
+    block[:, :, :digits] = _hex_digits(words, digits).reshape(rows, per_line, digits)
+    line[:, 10:-1] = block.reshape(rows, -1)
+    line[:, -1] = ord("\n")
+    return line.tobytes()
+
+
+def _mem_lines(words, digits):
+    """
+    One word per line (bytes)
+    """
+    line = np.empty((len(words), digits + 1), dtype=np.uint8)
+    line[:, :digits] = _hex_digits(words, digits)
+    line[:, -1] = ord("\n")
+    return line.tobytes()
+
+
+def _bin_dtype(OW):
+    for dtype in (np.int8, np.int16, np.int32, np.int64):
+        if OW <= 8 * np.dtype(dtype).itemsize:
+            return np.dtype(dtype).newbyteorder("<")
+    raise ValueError("OW=%d is too wide" % OW)
+
+
+def write(path, PW=17, OW=13, fmt=None, chunk=1 << 16):
+    """
+    Write the table to ``path``, ``chunk`` entries at a time
+
+    :param path: output file
+    :param PW: number of bits in the input phase
+    :param OW: number of output bits
+    :param fmt: ``hex``, ``mem`` or ``bin`` (from the extension of ``path`` if None)
+    :param chunk: entries formatted at a time (a multiple of 8)
+    """
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".")
+    if fmt not in FORMATS:
+        raise ValueError("unknown format %r, use one of %s" % (fmt, FORMATS))
+    quarter = quarter_wave(PW, OW)
+    size = 1 << PW
+    digits = (OW + 3) // 4
+    mask = (1 << OW) - 1
+    with open(path, "wb") as f:
+        for start in range(0, size, chunk):
+            values = sin_table(PW, OW, start, min(start + chunk, size), quarter)
+            if fmt == "bin":
+                f.write(values.astype(_bin_dtype(OW)).tobytes())
+                continue
+            words = values & mask
+            if fmt == "mem":
+                f.write(_mem_lines(words, digits))
+            elif len(words) % 8 == 0:
+                f.write(_hex_lines(words, start, digits))
+            else:  # tables with less than 8 entries
+                f.write(("@%08x %s \n" % (start, " ".join("%0*x" % (digits, w) for w in words))).encode())
+
+
+def cached(PW=17, OW=13, fmt="hex"):
+    """
+    Path of the cached table for ``PW``/``OW``/``fmt`` (generated on first use)
+    """
+    path = os.path.join(CACHE_DIR, "sintable-v%d-PW%d-OW%d.%s" % (VERSION, PW, OW, fmt))
+    if not os.path.exists(path):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix="." + fmt)
+        os.close(fd)
+        try:
+            write(tmp, PW, OW, fmt)
+            os.replace(tmp, path)  # atomic, concurrent generators don't collide
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return path
+
+
+def install(dest, PW=17, OW=13, fmt=None):
+    """
+    Copy the (cached) table for ``PW``/``OW`` to ``dest`` (atomically, so a
+    simulator never reads a half-written table) and return ``dest``
+    """
+    fmt = fmt or os.path.splitext(dest)[1].lstrip(".")
+    directory = os.path.dirname(os.path.abspath(dest))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix="." + fmt)
+    os.close(fd)
+    try:
+        shutil.copyfile(cached(PW, OW, fmt), tmp)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return dest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", nargs="?", default="sintable.hex",
+                        help="output file, .hex, .mem or .bin (default: %(default)s)")
+    parser.add_argument("--pw", type=int, default=17, help="number of bits in the input phase")
+    parser.add_argument("--ow", type=int, default=13, help="number of output bits")
+    parser.add_argument("--no-cache", action="store_true", help="always generate the table")
+    args = parser.parse_args()
+    if args.no_cache:
+        write(args.output, args.pw, args.ow)
+    else:
+        install(args.output, args.pw, args.ow)
+    sys.exit(0)
@@ -0,0 +1,67 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Spectral quality of captured sine waves (SFDR/SNR) for the wave generators.
+
+The records are meant to be coherent: ``n`` samples holding exactly ``cycles``
+periods (``cycles`` odd, so every sample hits a different phase), which puts
+the whole tone in one FFT bin and needs no window. :func:`phase_sweep` gives
+the matching phase accumulator sequence for a ``PW`` bit phase input.
+"""
+
+import numpy as np
+
+
+def phase_sweep(PW, n, cycles, phase0=0):
+    """
+    Phase accumulator output for a coherent record: ``n`` phases (``n`` a power
+    of two, at most ``2^PW``) advancing by ``cycles * 2^PW / n`` per sample
+
+    :param PW: number of bits in the phase
+    :param n: number of samples
+    :param cycles: number of periods in the record
+    :param phase0: initial phase
+    """
+    step, rem = divmod(cycles << PW, n)
+    if rem:
+        raise ValueError("n=%d does not divide cycles * 2^%d" % (n, PW))
+    return (phase0 + step * np.arange(n, dtype=np.int64)) & ((1 << PW) - 1)
+
+
+def ideal_sine(PW, phases, amplitude):
+    """
+    Ideal (unquantized) ``amplitude * sin(2*pi*phase/2^PW)``
+    """
+    return amplitude * np.sin(2 * np.pi * np.asarray(phases, dtype=np.float64) / (1 << PW))
+
+
+def metrics(x, cycles, ideal=None):
+    """
+    Spectral metrics of the coherent record ``x`` with the tone in bin ``cycles``
+
+    * ``sfdr_db``: tone power over the largest other bin (DC included)
+    * ``snr_db``: tone power over the power of all the other bins but DC
+    * ``enob``: effective number of bits from ``snr_db``
+    * ``error_snr_db``: power of ``ideal`` over the power of ``x - ideal``
+      (only if ``ideal`` is given)
+
+    :param x: captured samples
+    :param cycles: FFT bin of the tone
+    :param ideal: ideal samples for the same phases (optional)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    power = np.abs(np.fft.rfft(x)) ** 2
+    tone = power[cycles]
+    rest = power.copy()
+    rest[cycles] = 0
+    result = {
+        "sfdr_db": 10 * np.log10(tone / max(rest.max(), np.finfo(float).tiny)),
+        "snr_db": 10 * np.log10(tone / max(rest[1:].sum(), np.finfo(float).tiny)),
+    }
+    result["enob"] = (result["snr_db"] - 1.76) / 6.02
+    if ideal is not None:
+        error = x - ideal
+        result["error_snr_db"] = 10 * np.log10(np.sum(ideal ** 2) /
+                                               max(np.sum(error ** 2), np.finfo(float).tiny))
+    return result
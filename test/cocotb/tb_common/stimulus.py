@@ -0,0 +1,127 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Constrained-random stimulus for the primitives, generated in bulk with NumPy.
+
+Every port gets its own generator, spawned from one seed, so the vectors of a
+port do not depend on how many samples the others drew. Per sample:
+
+* a sign combination bin is picked (e.g., ``a<0, b>=0``), uniformly over the
+  bins that exist for the ranges of the ports (signed ports only),
+* each operand is drawn uniformly from its range restricted to that sign, or,
+  with probability ``corner_weight``, from the corner values of that range
+  (min, min+1, -1, 0, 1, max-1, max).
+
+The seed of a test comes from cocotb's random seed and the test name
+(:func:`test_seed`), so ``make RANDOM_SEED=<seed> TESTCASE=<test>`` replays
+exactly the vectors of a failing run (see ``run_seeds.py``)::
+
+    A, B = Stimulus(test_seed("stream_test"), [len(dut.i_a), len(dut.i_b)], signed=True)(n)
+"""
+
+import hashlib
+import itertools
+import os
+
+import numpy as np
+
+
+def test_seed(name):
+    """
+    Seed of the test ``name``: a hash of the regression seed (``RANDOM_SEED``
+    environment variable or cocotb's random seed) and ``name``
+    """
+    seed = os.environ.get("RANDOM_SEED")
+    if seed is None:
+        import cocotb
+        seed = cocotb.RANDOM_SEED
+    digest = hashlib.sha256(("%s:%s" % (seed, name)).encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+class Operand(object):
+    """
+    Constrained-random values of one port
+
+    :param rng: ``np.random.Generator`` of this port
+    :param width: port width in bits
+    :param signed: two's complement range if True
+    :param low: smallest value (the minimum of the port if None)
+    :param high: largest value (the maximum of the port if None)
+    :param corner_weight: probability of a corner value
+    """
+    def __init__(self, rng, width, signed=False, low=None, high=None, corner_weight=0.1):
+        self.rng = rng
+        full_low = -(1 << (width - 1)) if signed else 0
+        full_high = (1 << (width - 1)) - 1 if signed else (1 << width) - 1
+        self.low = full_low if low is None else max(low, full_low)
+        self.high = full_high if high is None else min(high, full_high)
+        if self.low > self.high:
+            raise ValueError("empty range [%d, %d]" % (self.low, self.high))
+        self.corner_weight = corner_weight
+        # (low, high, corners) of the negative and of the non-negative part
+        self.parts = []
+        for lo, hi in ((self.low, min(self.high, -1)), (max(self.low, 0), self.high)):
+            corners = sorted({v for v in (lo, lo + 1, -1, 0, 1, hi - 1, hi) if lo <= v <= hi})
+            self.parts.append((lo, hi, np.array(corners, dtype=np.int64)) if lo <= hi else None)
+
+    def signs(self):
+        """
+        Signs this port can take: list of 0 (negative) and/or 1 (non-negative)
+        """
+        return [i for i, part in enumerate(self.parts) if part is not None]
+
+    def draw(self, n, part=None):
+        """
+        ``n`` values; ``part[i]`` selects the sign of value ``i`` (0: negative,
+        1: non-negative), any sign if None
+        """
+        if part is None:
+            values = self.rng.integers(self.low, self.high + 1, size=n, dtype=np.int64)
+            part = (values >= 0).astype(np.int64)
+        else:
+            lo = np.array([p[0] if p else 0 for p in self.parts], dtype=np.int64)[part]
+            hi = np.array([p[1] if p else 0 for p in self.parts], dtype=np.int64)[part]
+            values = self.rng.integers(lo, hi + 1, dtype=np.int64)
+        corner = np.flatnonzero(self.rng.random(n) < self.corner_weight)
+        for sign in self.signs():
+            idx = corner[part[corner] == sign]
+            corners = self.parts[sign][2]
+            values[idx] = corners[self.rng.integers(0, len(corners), size=len(idx))]
+        return values
+
+
+class Stimulus(object):
+    """
+    Constrained-random operand vectors for a set of ports
+
+    :param seed: seed (e.g., :func:`test_seed`); one generator per port and one
+                 for the bins are spawned from it
+    :param widths: list of port widths
+    :param signed: two's complement ports if True
+    :param ranges: list of (low, high) per port, None for the full range
+    :param corner_weight: probability of a corner value per operand
+    :param sign_bins: spread the samples evenly over the sign combinations
+                      (otherwise every operand is uniform over its range)
+    """
+    def __init__(self, seed, widths, signed=False, ranges=None, corner_weight=0.1, sign_bins=True):
+        children = np.random.SeedSequence(seed).spawn(len(widths) + 1)
+        self.rng = np.random.default_rng(children[0])
+        ranges = ranges or [(None, None)] * len(widths)
+        self.operands = [Operand(np.random.default_rng(child), width, signed, low, high,
+                                 corner_weight)
+                         for child, width, (low, high) in zip(children[1:], widths, ranges)]
+        self.bins = None
+        if sign_bins and signed:
+            self.bins = np.array(list(itertools.product(*[op.signs() for op in self.operands])),
+                                 dtype=np.int64)
+
+    def __call__(self, n):
+        """
+        List of ``n`` values per port
+        """
+        if self.bins is None:
+            return [op.draw(n) for op in self.operands]
+        picked = self.bins[self.rng.integers(0, len(self.bins), size=n)]
+        return [op.draw(n, picked[:, j]) for j, op in enumerate(self.operands)]
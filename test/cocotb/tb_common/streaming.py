@@ -0,0 +1,221 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Streaming driver/monitor pipeline for the one-result-per-clock primitives.
+
+The driver pushes one sample per clock from NumPy arrays, the monitor collects
+the output into a preallocated array, and the check against the golden model
+is done in bulk at the end. Nothing is allocated per sample (no
+``BinaryValue``, no list appends), so long random regressions are cheap.
+
+Typical use (inside a cocotb test)::
+
+    yield clkedge  # synchronize ourselves with the clock
+    o_sum = yield stream(dut.i_clk, [dut.i_a, dut.i_b], [A, B], dut.o_sum, signed=True)
+    check(dut, "stream_test", A + B, o_sum, A, B)
+"""
+
+import cocotb
+import numpy as np
+from cocotb.decorators import coroutine
+from cocotb.result import TestFailure
+from cocotb.triggers import ReadOnly, RisingEdge
+
+from tb_common.conversions import to_signed, to_unsigned, word_dtype
+
+
+def random_words(rng, width, n, signed=False):
+    """
+    ``n`` uniformly distributed random words over the full range of a ``width`` bit port
+
+    :param rng: ``np.random.Generator``
+    :param width: port width in bits
+    :param n: number of words
+    :param signed: two's complement range if True
+    """
+    if signed:
+        low, high = -(1 << (width - 1)), 1 << (width - 1)
+    else:
+        low, high = 0, 1 << width
+    return rng.integers(low, high, size=n, dtype=np.int64)
+
+
+def boundary_words(width, signed=False):
+    """
+    Boundary values of a ``width`` bit port: min, min+1, -1, 0, 1, max-1, max
+    (the ones that exist for the given range)
+
+    :param width: port width in bits
+    :param signed: two's complement range if True
+    """
+    if signed:
+        low, high = -(1 << (width - 1)), (1 << (width - 1)) - 1
+    else:
+        low, high = 0, (1 << width) - 1
+    values = {low, low + 1, -1, 0, 1, high - 1, high}
+    return np.array(sorted(v for v in values if low <= v <= high), dtype=np.int64)
+
+
+def all_words(width, signed=False):
+    """
+    Every value of a ``width`` bit port, in increasing order
+
+    :param width: port width in bits
+    :param signed: two's complement range if True
+    """
+    if signed:
+        return np.arange(-(1 << (width - 1)), 1 << (width - 1), dtype=np.int64)
+    return np.arange(0, 1 << width, dtype=np.int64)
+
+
+def sweep_words(rng, kind, awidth, bwidth, n, signed=False):
+    """
+    Operand pairs for a width sweep
+
+    :param rng: ``np.random.Generator``
+    :param kind: ``random`` (``n`` pairs over the full range), ``boundary``
+                 (cross product of :func:`boundary_words` of both ports) or
+                 ``exhaustive`` (cross product of :func:`all_words`, i.e.,
+                 ``2^(awidth+bwidth)`` pairs ... narrow widths only)
+    :param awidth: width of the first port
+    :param bwidth: width of the second port
+    :param n: number of random pairs
+    :param signed: two's complement ranges if True
+    """
+    if kind == "random":
+        return random_words(rng, awidth, n, signed), random_words(rng, bwidth, n, signed)
+    if kind == "boundary":
+        A, B = np.meshgrid(boundary_words(awidth, signed), boundary_words(bwidth, signed))
+        return A.ravel(), B.ravel()
+    if kind == "exhaustive":
+        A, B = np.meshgrid(all_words(awidth, signed), all_words(bwidth, signed))
+        return A.ravel(), B.ravel()
+    raise ValueError("unknown stimulus %r" % kind)
+
+
+class StreamDriver(object):
+    """
+    Drive a set of signals from NumPy arrays, one sample per clock.
+
+    The first sample is driven as soon as the driver is started, the next one
+    after every rising edge of ``clk``.
+
+    :param clk: reference clock
+    :param signals: list of signals to be driven
+    :param data: list of arrays (one per signal, all of the same length)
+    """
+    def __init__(self, clk, signals, data):
+        self.clk = clk
+        self.signals = signals
+        # raw (two's complement) words as python ints ... cheapest to assign
+        self.columns = [to_unsigned(x, len(sig)).tolist() for sig, x in zip(signals, data)]
+        self._coro = None
+
+    @coroutine
+    def _run(self):
+        clkedge = RisingEdge(self.clk)
+        signals = self.signals
+        for i, words in enumerate(zip(*self.columns)):
+            if i:
+                yield clkedge
+            for sig, word in zip(signals, words):
+                sig <= word
+
+    def start(self):
+        """
+        Start driving (returns the forked coroutine)
+        """
+        self._coro = cocotb.fork(self._run())
+        return self._coro
+
+
+class StreamMonitor(object):
+    """
+    Capture a signal into a preallocated array, one sample per clock.
+
+    The raw words are kept in the :func:`tb_common.conversions.word_dtype` of
+    the signal width, so 64 bit and wider outputs are captured exactly.
+
+    :param clk: reference clock
+    :param signal: signal to be monitored
+    :param n: number of samples to capture
+    :param latency: clock cycles between driving an input and seeing its result
+    :param signed: decode the captured words as two's complement if True
+    """
+    def __init__(self, clk, signal, n, latency=1, signed=False):
+        self.clk = clk
+        self.signal = signal
+        self.latency = latency
+        self.signed = signed
+        self.raw = np.zeros(n, dtype=word_dtype(len(signal)))
+
+    @coroutine
+    def _run(self):
+        clkedge = RisingEdge(self.clk)
+        readonly = ReadOnly()
+        for _ in range(self.latency - 1):
+            yield clkedge
+        raw = self.raw
+        signal = self.signal
+        for i in range(len(raw)):
+            yield clkedge
+            yield readonly  # let the registered output settle
+            raw[i] = signal.value.integer
+
+    def start(self):
+        """
+        Start capturing (returns the forked coroutine)
+        """
+        return cocotb.fork(self._run())
+
+    @property
+    def data(self):
+        """
+        Captured samples (decoded as two's complement if ``signed``)
+        """
+        if not self.signed:
+            return self.raw
+        return to_signed(self.raw, len(self.signal))
+
+
+@coroutine
+def stream(clk, signals, data, output, latency=1, signed=False):
+    """
+    Drive ``data`` into ``signals`` and capture the same number of samples of
+    ``output``; returns the captured array. Start it right after a rising edge.
+
+    :param clk: reference clock
+    :param signals: list of input signals
+    :param data: list of input arrays (one per signal)
+    :param output: output signal
+    :param latency: clock cycles from input to output
+    :param signed: decode the output as two's complement if True
+    """
+    monitor = StreamMonitor(clk, output, len(data[0]), latency, signed)
+    StreamDriver(clk, signals, data).start()
+    yield monitor.start().join()
+    return monitor.data
+
+
+def check(dut, name, expected, observed, *inputs, max_report=10):
+    """
+    Compare the expected and observed arrays in one go; on mismatch, report the
+    first ``max_report`` failing samples (with their inputs) and fail the test
+
+    :param dut: Veriog module under test (for logging)
+    :param name: test name
+    :param expected: expected output array
+    :param observed: captured output array
+    :param inputs: input arrays, reported along with the failing samples
+    """
+    expected = np.asarray(expected)
+    observed = np.asarray(observed)
+    bad = np.flatnonzero(expected != observed)
+    if bad.size == 0:
+        dut._log.info("%s passed (%d samples)" % (name, len(observed)))
+        return
+    for i in bad[:max_report]:
+        dut._log.error("sample %d: inputs %s, expected %s, got %s"
+                       % (i, [int(x[i]) for x in inputs], expected[i], observed[i]))
+    raise TestFailure("%s failed: %d of %d samples mismatched" % (name, bad.size, len(observed)))
@@ -0,0 +1,521 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Columnar signal trace recorder, a replacement for ``cocotb.wavedrom`` on long runs.
+
+The signals are sampled after every rising edge of the clock into a
+preallocated ``(chunk, signals)`` array of raw words (plus a validity mask for
+``x``/``z`` values). A full chunk is appended to a spool file (next to
+``path``, or a temporary one without a ``path``, removed by
+:meth:`TraceRecorder.close`), and :meth:`TraceRecorder.close` copies the spool
+column by column into one ``.npz`` file with one array per signal, so memory
+stays bounded (one chunk) whatever the length of the run.
+WaveDrom JSON is rendered on demand for a window of cycles only::
+
+    with TraceRecorder(dut.i_clk, [dut.i_a, dut.i_b, dut.o_sum], "trace.npz") as waves:
+        ...
+        waves.write("wavedrom.json", start=1000, stop=1040, header={"tick": 0})
+
+    trace = load("trace.npz")  # {"i_a": array, ..., "i_a.valid": array, ...}
+
+For long regressions, :class:`WindowTrace` keeps only the last ``depth`` cycles
+in a ring buffer and writes a VCD segment around each call of
+:meth:`WindowTrace.trigger`, so a run costs no trace file unless something
+goes wrong::
+
+    waves = WindowTrace(dut.i_clk, [dut.i_a, dut.i_b, dut.o_sum], "trigger")
+    waves.start()
+    ...
+    waves.trigger("overflow")  # trigger-<cycle>.vcd around the last cycle
+
+Around scoreboard mismatches, :class:`MismatchWindow` writes the same segments
+from the ring buffers the :class:`tb_common.scoreboard.StreamScoreboard`
+samples anyway, so a passing run is not slowed down at all::
+
+    sb = yield checked_stream(..., trace=MismatchWindow("mismatch"))
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import zipfile
+
+import cocotb
+import numpy as np
+from cocotb.decorators import coroutine
+from cocotb.triggers import ReadOnly, RisingEdge
+from cocotb.utils import get_sim_time
+
+from tb_common.conversions import to_signed
+
+
+class TraceRecorder(object):
+    """
+    Record ``signals`` once per clock cycle into NumPy columns.
+
+    :param clk: sampling clock (signals are read after each rising edge)
+    :param signals: list of signal handles (at most 64 bits wide)
+    :param path: ``.npz`` file written by :meth:`close` (if None, the cycles are
+                 only kept until :meth:`close`, beyond one chunk in a temporary file)
+    :param chunk: number of cycles per chunk
+    :param signed: decode multi-bit values as two's complement in the WaveDrom output
+    """
+    def __init__(self, clk, signals, path=None, chunk=1 << 16, signed=False):
+        self.clk = clk
+        self.signals = signals
+        self.names = [s._name for s in signals]
+        self.widths = [len(s) for s in signals]
+        self.path = path
+        self.chunk = chunk
+        self.signed = signed
+        self.cycles = 0  # samples taken
+        self._values = np.zeros((chunk, len(signals)), dtype=np.uint64)
+        self._valid = np.zeros((chunk, len(signals)), dtype=np.bool_)
+        self._fill = 0  # samples in the current chunk
+        self._spool = None  # (values, validity) files of the full chunks
+        if path is not None:
+            self._spool = (open(path + ".values.part", "wb"), open(path + ".valid.part", "wb"))
+        self._coro = None
+
+    @coroutine
+    def _run(self):
+        clkedge = RisingEdge(self.clk)
+        readonly = ReadOnly()
+        while True:
+            yield clkedge
+            yield readonly
+            self.sample()
+
+    def sample(self):
+        """
+        Record the current values of the signals as the next cycle
+        """
+        values = [s.value for s in self.signals]
+        valid = [v.is_resolvable for v in values]
+        self._values[self._fill] = [v.integer if ok else 0 for v, ok in zip(values, valid)]
+        self._valid[self._fill] = valid
+        self._fill += 1
+        self.cycles += 1
+        if self._fill == self.chunk:
+            self._flush()
+
+    def _flush(self):
+        if self._spool is None:  # no path: spool to temporary files
+            spool = []
+            for suffix in (".values", ".valid"):
+                fd, name = tempfile.mkstemp(prefix="trace-", suffix=suffix)
+                os.close(fd)
+                spool.append(open(name, "wb"))
+            self._spool = tuple(spool)
+        self._values[:self._fill].tofile(self._spool[0])
+        self._valid[:self._fill].tofile(self._spool[1])
+        self._fill = 0
+
+    def _spooled(self):
+        """
+        Memory maps (raw values, validity) of the spooled cycles, None if there are none
+        """
+        n = self.cycles - self._fill
+        if self._spool is None or not n:
+            return None
+        for f in self._spool:
+            f.flush()
+        return tuple(np.memmap(f.name, dtype=dtype, mode="r", shape=(n, len(self.signals)))
+                     for f, dtype in zip(self._spool, (np.uint64, np.bool_)))
+
+    def start(self):
+        """
+        Start sampling (returns the forked coroutine)
+        """
+        self._coro = cocotb.fork(self._run())
+        return self._coro
+
+    def stop(self):
+        """
+        Stop sampling
+        """
+        if self._coro is not None:
+            self._coro.kill()
+            self._coro = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def columns(self, start=0, stop=None):
+        """
+        (raw values, validity) of cycles ``start .. stop-1``, each (cycles, signals)
+        """
+        stop = self.cycles if stop is None else min(stop, self.cycles)
+        start = max(0, min(start, stop))
+        spooled = self._spooled()
+        full = [spooled] if spooled is not None else []
+        values, valid = [self._values[:0]], [self._valid[:0]]
+        offset = self.cycles - self._fill - sum(len(v) for v, ok in full)  # > 0 after close
+        for v, ok in full + [(self._values[:self._fill], self._valid[:self._fill])]:
+            lo, hi = max(start - offset, 0), min(stop - offset, len(v))
+            if lo < hi:
+                values.append(v[lo:hi])
+                valid.append(ok[lo:hi])
+            offset += len(v)
+        return np.concatenate(values), np.concatenate(valid)
+
+    def wavedrom(self, start=0, stop=None, header=None, config=None):
+        """
+        WaveDrom dictionary of cycles ``start .. stop-1`` (the clock plus every signal)
+        """
+        values, valid = self.columns(start, stop)
+        n = len(values)
+        lanes = [{"name": self.clk._name, "wave": "p" + "." * (n - 1) if n else ""}]
+        for j, (name, width) in enumerate(zip(self.names, self.widths)):
+            wave, data, last = [], [], None
+            for value, ok in zip(values[:, j].tolist(), valid[:, j].tolist()):
+                if not ok:
+                    symbol = "x"
+                elif width == 1:
+                    symbol = str(value)
+                else:
+                    symbol = "="
+                    value = to_signed(value, width) if self.signed else value
+                current = (symbol, value if ok else None)
+                if current == last:
+                    wave.append(".")
+                    continue
+                wave.append(symbol)
+                if symbol == "=":
+                    data.append(str(value))
+                last = current
+            lane = {"name": name, "wave": "".join(wave)}
+            if data:
+                lane["data"] = data
+            lanes.append(lane)
+        waves = {"signal": lanes}
+        if header:
+            waves["head"] = header
+        if config:
+            waves["config"] = config
+        return waves
+
+    def dumpj(self, start=0, stop=None, header=None, config=None, indent=2):
+        """
+        WaveDrom JSON string of cycles ``start .. stop-1``
+        """
+        return json.dumps(self.wavedrom(start, stop, header, config), indent=indent)
+
+    def write(self, filename, start=0, stop=None, header=None, config=None):
+        """
+        Write the WaveDrom JSON of cycles ``start .. stop-1`` to ``filename``
+        """
+        with open(filename, "w") as f:
+            f.write(self.dumpj(start, stop, header, config))
+
+    def close(self):
+        """
+        Stop sampling, write the ``.npz`` file (if a ``path`` was given) and
+        remove the spool
+        """
+        self.stop()
+        if self.path is not None:
+            self._flush()  # the last (partial) chunk
+            self._save()
+        if self._spool is None:
+            return
+        for f in self._spool:
+            f.close()
+            os.remove(f.name)
+        self._spool = None
+
+    def _save(self):
+        """
+        Copy the spool into the ``.npz`` file, one signal at a time (the same
+        layout as ``np.savez``, without loading the trace into memory)
+        """
+        spooled = self._spooled()
+        if spooled is None:
+            spooled = (np.zeros((0, len(self.signals)), dtype=np.uint64),
+                       np.zeros((0, len(self.signals)), dtype=np.bool_))
+        values, valid = spooled
+        path = self.path if self.path.endswith(".npz") else self.path + ".npz"
+        with zipfile.ZipFile(path, "w", allowZip64=True) as npz:
+            _write_npy(npz, "cycles", np.array(self.cycles))
+            _write_npy(npz, "widths", np.array(self.widths))
+            for j, name in enumerate(self.names):
+                _write_npy(npz, name, values[:, j])
+                _write_npy(npz, name + ".valid", valid[:, j])
+
+
+def _write_npy(npz, name, array):
+    # write_array streams non-contiguous arrays (a column of the spool) in small buffers
+    with npz.open(name + ".npy", "w", force_zip64=True) as f:
+        np.lib.format.write_array(f, array, allow_pickle=False)
+
+
+class WindowTrace(TraceRecorder):
+    """
+    Record ``signals`` into a ring buffer of the last ``depth`` cycles and write
+    ``pre`` cycles before and ``post`` cycles after each trigger to
+    ``<prefix>-<cycle>.vcd`` (converted to ``.fst`` if ``fst`` and ``vcd2fst``
+    is found).
+
+    :param clk: sampling clock (signals are read after each rising edge)
+    :param signals: list of signal handles (at most 64 bits wide)
+    :param prefix: path prefix of the dumps
+    :param pre: cycles dumped before the trigger
+    :param post: cycles dumped after the trigger (recorded before writing)
+    :param depth: cycles kept, ``pre + post + 4096`` by default, so that a
+                  trigger up to 4096 cycles late is still in the window
+    :param max_dumps: triggers dumped at most (the first ones)
+    :param fst: write FST instead of VCD (needs ``vcd2fst`` of GTKWave)
+    :param signed: decode multi-bit values as two's complement in the WaveDrom output
+    :param period: clock period in ns (for the falling edges of the dumps)
+    """
+    def __init__(self, clk, signals, prefix="trigger", pre=256, post=32, depth=None,
+                 max_dumps=5, fst=False, signed=False, period=10):
+        depth = depth or pre + post + 4096
+        super(WindowTrace, self).__init__(clk, signals, None, depth, signed)
+        self.prefix = prefix
+        self.pre = pre
+        self.post = post
+        self.max_dumps = max_dumps
+        self.fst = fst
+        self.period = period
+        self._times = np.zeros(depth)
+        self._pending = []  # (label, cycle, last cycle of the dump)
+        self.dumps = []  # files written
+
+    def sample(self):
+        """
+        Record the current values of the signals as the next cycle (overwriting
+        the oldest one) and write the dumps whose post-trigger cycles are in
+        """
+        row = self.cycles % self.chunk
+        values = [s.value for s in self.signals]
+        valid = [v.is_resolvable for v in values]
+        self._values[row] = [v.integer if ok else 0 for v, ok in zip(values, valid)]
+        self._valid[row] = valid
+        self._times[row] = get_sim_time("ns")
+        self.cycles += 1
+        while self._pending and self.cycles > self._pending[0][2]:
+            self._dump(*self._pending.pop(0))
+
+    def _window(self, start, stop):
+        stop = self.cycles if stop is None else min(stop, self.cycles)
+        start = max(start, self.cycles - self.chunk, 0)
+        return np.arange(start, max(start, stop)) % self.chunk
+
+    def columns(self, start=0, stop=None):
+        """
+        (raw values, validity) of the cycles ``start .. stop-1`` still in the window
+        """
+        rows = self._window(start, stop)
+        return self._values[rows], self._valid[rows]
+
+    def trigger(self, label="trigger", cycle=None):
+        """
+        Dump the cycles around ``cycle`` (the last one sampled if None) once the
+        ``post`` cycles after it are recorded; triggers within a pending dump and
+        beyond ``max_dumps`` are ignored. Returns the file to be written or None.
+        """
+        cycle = self.cycles - 1 if cycle is None else int(cycle)
+        if len(self.dumps) + len(self._pending) >= self.max_dumps:
+            return None
+        if self._pending and cycle <= self._pending[-1][2]:
+            return None
+        if cycle < self.cycles - self.chunk:
+            cocotb.log.warning("%s: cycle %d already left the window of %d cycles"
+                               % (label, cycle, self.chunk))
+        self._pending.append((label, cycle, cycle + self.post))
+        return self._path(cycle)
+
+    def _path(self, cycle):
+        return "%s-%d.%s" % (self.prefix, cycle, "fst" if self.fst else "vcd")
+
+    def _dump(self, label, cycle, last):
+        rows = self._window(cycle - self.pre, last + 1)
+        path = _write_window(self._path(cycle), self.clk._name, self.names, self.widths,
+                             self._values[rows], self._valid[rows], self._times[rows],
+                             self.period, "%s at cycle %d" % (label, cycle))
+        self.dumps.append(path)
+        cocotb.log.info("%s at cycle %d: %d cycles dumped to %s" % (label, cycle, len(rows), path))
+
+    def close(self):
+        """
+        Stop sampling and write the pending dumps with the cycles recorded so far
+        """
+        self.stop()
+        while self._pending:
+            self._dump(*self._pending.pop(0))
+
+
+class MismatchWindow(object):
+    """
+    Write ``pre`` cycles before and ``post`` cycles after the first failing
+    sample of every mismatching batch of a
+    :class:`tb_common.scoreboard.StreamScoreboard` to ``<prefix>-<cycle>.vcd``,
+    taken from the ring buffers of the scoreboard itself: nothing is sampled on
+    top of the scoreboard, so a passing run costs no more than an untraced one.
+    The scoreboard keeps ``pre + post`` samples of history for it (see
+    :func:`tb_common.scoreboard.checked_stream`).
+
+    :param prefix: path prefix of the dumps
+    :param pre: cycles dumped before the mismatch
+    :param post: cycles dumped after the mismatch (sampled before writing)
+    :param max_dumps: mismatches dumped at most (the first ones)
+    :param fst: write FST instead of VCD (needs ``vcd2fst`` of GTKWave)
+    :param period: clock period in ns (the scoreboard samples once per period)
+    """
+    def __init__(self, prefix="mismatch", pre=256, post=32, max_dumps=5, fst=False, period=10):
+        self.prefix = prefix
+        self.pre = pre
+        self.post = post
+        self.max_dumps = max_dumps
+        self.fst = fst
+        self.period = period
+        self.scoreboard = None
+        self._t0 = 0.0  # time of sample 0 in ns
+        self._pending = []  # (label, cycle, last cycle of the dump)
+        self.dumps = []  # files written
+
+    def attach(self, scoreboard):
+        """
+        Dump around the mismatches of ``scoreboard``; the cycles are its sample
+        indices and the dumps are written as soon as it has sampled their
+        ``post`` cycles
+        """
+        if scoreboard.history < self.pre + self.post:
+            cocotb.log.warning("scoreboard keeps %d samples of history, %d cycles are dumped"
+                               % (scoreboard.history, self.pre + self.post))
+        self.scoreboard = scoreboard
+        self._t0 = get_sim_time("ns") - scoreboard.samples * self.period
+        scoreboard.on_mismatch.append(lambda samples: self.trigger("mismatch", samples[0]))
+        scoreboard.on_compare.append(self._flush)
+
+    def trigger(self, label, cycle):
+        """
+        Dump the cycles around sample ``cycle`` of the scoreboard; triggers within
+        a pending dump and beyond ``max_dumps`` are ignored. Returns the file to
+        be written or None.
+        """
+        cycle = int(cycle)
+        if len(self.dumps) + len(self._pending) >= self.max_dumps:
+            return None
+        if self._pending and cycle <= self._pending[-1][2]:
+            return None
+        self._pending.append((label, cycle, cycle + self.post))
+        return self._path(cycle)
+
+    def _path(self, cycle):
+        return "%s-%d.%s" % (self.prefix, cycle, "fst" if self.fst else "vcd")
+
+    def _flush(self):
+        while self._pending and self.scoreboard.samples > self._pending[0][2]:
+            self._dump(*self._pending.pop(0))
+
+    def _dump(self, label, cycle, last):
+        sb = self.scoreboard
+        t, inputs, output = sb.history_window(cycle - self.pre, last + 1)
+        values = np.column_stack([inputs.astype(object), output.astype(object)])
+        signals = sb.inputs + [sb.output]
+        path = _write_window(self._path(cycle), sb.clk._name, [s._name for s in signals],
+                             [len(s) for s in signals], values,
+                             np.ones(values.shape, dtype=np.bool_),
+                             self._t0 + t * self.period, self.period,
+                             "%s at cycle %d" % (label, cycle))
+        self.dumps.append(path)
+        cocotb.log.info("%s at cycle %d: %d cycles dumped to %s" % (label, cycle, len(t), path))
+
+    def close(self):
+        """
+        Write the pending dumps with the cycles sampled so far
+        """
+        while self._pending:
+            self._dump(*self._pending.pop(0))
+
+
+def window_trace(name):
+    """
+    :class:`MismatchWindow` dumping ``TRACE_WINDOW`` cycles (256 by default)
+    before each mismatch to ``<name>-<cycle>.vcd`` next to the results file, or
+    None with ``TRACE_WINDOW=0``
+
+    :param name: prefix of the dumps (e.g., the test name)
+    """
+    pre = int(os.environ.get("TRACE_WINDOW", 256))
+    if not pre:
+        return None
+    results = os.environ.get("COCOTB_RESULTS_FILE", "results.xml")
+    return MismatchWindow(os.path.join(os.path.dirname(results), name), pre=pre)
+
+
+def _write_window(path, clk, names, widths, values, valid, times, period, comment):
+    # VCD of the window, converted to FST if path asks for it and vcd2fst is found
+    vcd_path = path[:-4] + ".vcd"
+    write_vcd(vcd_path, clk, names, widths, values, valid, times, period, comment)
+    if path.endswith(".fst") and shutil.which("vcd2fst"):
+        subprocess.check_call(["vcd2fst", vcd_path, path])
+        os.remove(vcd_path)
+        return path
+    return vcd_path
+
+
+def _vcd_id(i):
+    chars = ""
+    while True:
+        chars += chr(33 + i % 94)
+        i //= 94
+        if not i:
+            return chars
+
+
+def write_vcd(path, clk, names, widths, values, valid, times, period, comment=""):
+    """
+    Write sampled cycles as a VCD file (timescale 1 ps), the clock included
+
+    :param path: output file
+    :param clk: clock name
+    :param names: signal names
+    :param widths: signal widths
+    :param values: raw values, (cycles, signals)
+    :param valid: validity (False for ``x``/``z``), (cycles, signals)
+    :param times: sampling time of each cycle (rising edge) in ns
+    :param period: clock period in ns (for the falling edges)
+    :param comment: ``$comment`` of the header
+    """
+    ids = [_vcd_id(i) for i in range(len(names) + 1)]
+    half = int(round(period * 500))
+    with open(path, "w") as f:
+        if comment:
+            f.write("$comment %s $end\n" % comment)
+        f.write("$timescale 1ps $end\n$scope module top $end\n")
+        f.write("$var wire 1 %s %s $end\n" % (ids[0], clk))
+        for i, (name, width) in enumerate(zip(names, widths)):
+            f.write("$var wire %d %s %s $end\n" % (width, ids[i + 1], name))
+        f.write("$upscope $end\n$enddefinitions $end\n")
+        last = [-1] * len(names)  # no value yet (raw values are >= 0, None is x)
+        for t, row, ok in zip(times.tolist(), values.tolist(), valid.tolist()):
+            t = int(round(t * 1000))
+            f.write("#%d\n1%s\n" % (t, ids[0]))
+            for j, (value, good) in enumerate(zip(row, ok)):
+                value = value if good else None
+                if value == last[j]:
+                    continue
+                last[j] = value
+                if widths[j] == 1:
+                    f.write("%s%s\n" % ("x" if value is None else value, ids[j + 1]))
+                else:
+                    f.write("b%s %s\n" % ("x" if value is None else format(value, "b"), ids[j + 1]))
+            f.write("#%d\n0%s\n" % (t + half, ids[0]))
+
+
+def load(path):
+    """
+    Recorded trace as {signal name: raw values, signal name + ".valid": validity, ...}
+    """
+    with np.load(path) as npz:
+        return {name: npz[name] for name in npz.files}
@@ -12,7 +12,6 @@ import sys
 sys.path.insert(1, "/usr/lib/python3/dist-packages")  # for gnuradio
 
 import cocotb
-import cocotb.wavedrom
 from cocotb.binary import BinaryValue
 from cocotb.clock import Clock
 from cocotb.decorators import coroutine
@@ -25,13 +24,25 @@ from cocotb.triggers import RisingEdge, Timer, ReadWrite, ReadOnly
 
 import random
 import numpy as np
-from unsigned_adder_gr import main
+from tb_common.arith_tests import flowgraph_model, register
+from tb_common.models import add_vff, golden_models, reference
 
 
-@cocotb.test(timeout_time=200, timeout_unit="ns", skip=False)
-def gr_test(dut):
+LATENCY = 1  # clock cycles from i_a/i_b to o_sum (registered once)
+
+
+# golden reference model using the GNU Radio flowgraph (see tb_common/arith_tests.py)
+gr_model = flowgraph_model("add_vff", "unsigned_adder_gr")
+
+
+@cocotb.coroutine
+def gr_test(dut, model=None):
     """
-    Randmized test for o_sum = i_a + i_b (unsigned addition/subtraction) using GNU Radio
+    Randmized test for o_sum = i_a + i_b (unsigned addition/subtraction) against the golden model
+
+    :param dut: Veriog module under test
+    :param model: golden model (``numpy``, ``gnuradio`` or ``both``), see
+                  :func:`tb_common.models.reference`
     """
 
     # start the clock
@@ -66,22 +77,30 @@ def gr_test(dut):
         b_lst.append(i_B)
         sum_lst.append(o_SUM)
 
-    # pass the data to GNU Radio and get the return data
-    np.array(a_lst, dtype=np.float32).tofile("data_a.bin")
-    np.array(b_lst, dtype=np.float32).tofile("data_b.bin")
-    main()
-    sum_lst_gr = np.fromfile("data_sum.bin", dtype=np.float32)
+    # get the expected data from the golden model
+    sum_lst_ref = reference(add_vff, gr_model, a_lst, b_lst, model)
 
-    # compare the returned data with verilator output
-    if np.array_equal(sum_lst_gr, np.array(sum_lst)):
+    # compare the expected data with verilator output
+    if np.array_equal(sum_lst_ref, np.array(sum_lst)):
         dut._log.info("gr_test passed")
     else:
         raise TestFailure("gr_test failed")
 
     # print for convinience
-    print(np.fromfile("data_a.bin", dtype=np.float32))
-    print(np.fromfile("data_b.bin", dtype=np.float32))
-    print(np.fromfile("data_sum.bin", dtype=np.float32))
+    print(np.array(a_lst, dtype=np.float32))
+    print(np.array(b_lst, dtype=np.float32))
+    print(sum_lst_ref)
+
+
+# Register the golden model tests, one per GOLDEN_MODEL (e.g., gr_test_numpy_001)
+for model in golden_models():
+    factory = TestFactory(gr_test)
+    factory.add_option("model", [model])
+    factory.generate_tests(postfix="_" + model)
+
+
+# stream_test, scoreboard_test and the sweep tests (see tb_common/arith_tests.py)
+register(globals(), "unsigned_adder", "add", "o_sum", signed=False, latency=LATENCY)
 
 
 if __name__ == "__main__":
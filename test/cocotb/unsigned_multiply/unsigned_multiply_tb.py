@@ -12,7 +12,6 @@ import sys
 sys.path.insert(1,'/usr/lib/python3/dist-packages') # add gnuradio path
 
 import cocotb
-import cocotb.wavedrom
 from cocotb.binary import BinaryValue
 from cocotb.clock import Clock
 from cocotb.decorators import coroutine
@@ -25,12 +24,24 @@ from cocotb.triggers import RisingEdge, Timer, ReadWrite, ReadOnly
 
 import random
 import numpy as np
-from unsigned_multiply_gr import main
+from tb_common.arith_tests import flowgraph_model, register
+from tb_common.models import golden_models, multiply_vff, reference
 
-@cocotb.test(timeout_time=200, timeout_unit='ns', skip=False)
-def multiply_gr_test(dut):
+LATENCY = 1  # clock cycles from i_a/i_b to o_prod (registered once)
+
+
+# golden reference model using the GNU Radio flowgraph (see tb_common/arith_tests.py)
+gr_model = flowgraph_model('multiply_vff', 'unsigned_multiply_gr')
+
+
+@cocotb.coroutine
+def multiply_gr_test(dut, model=None):
     """
-    Randmized test for o_prod = i_a * i_b (signed multiplication) using GNU Radio
+    Randmized test for o_prod = i_a * i_b (signed multiplication) against the golden model
+
+    :param dut: Veriog module under test
+    :param model: golden model (``numpy``, ``gnuradio`` or ``both``), see
+                  :func:`tb_common.models.reference`
     """
 
     # start the clock
@@ -64,22 +75,30 @@ def multiply_gr_test(dut):
         b_lst.append(i_B)
         prod_lst.append(o_PROD)
     
-    # pass the data to Gnu Radio and get the return data
-    np.array(a_lst, dtype=np.float32).tofile("data_a.bin")
-    np.array(b_lst, dtype=np.float32).tofile("data_b.bin")
-    main() # call the main Gnu Radio flowgraph
-    prod_lst_gr = np.fromfile("data_prod.bin", dtype=np.float32)
-
-    # compare the returned data with verilator output
-    if np.array_equal(prod_lst_gr, np.array(prod_lst)):
+    # get the expected data from the golden model
+    prod_lst_ref = reference(multiply_vff, gr_model, a_lst, b_lst, model)
+
+    # compare the expected data with verilator output
+    if np.array_equal(prod_lst_ref, np.array(prod_lst)):
         dut._log.info("gr_test passed")
     else:
         raise TestFailure("gr_test failed")
 
     # print for convinience
-    print(np.fromfile("data_a.bin", dtype=np.float32))
-    print(np.fromfile("data_b.bin", dtype=np.float32))
-    print(np.fromfile("data_prod.bin", dtype=np.float32))    
+    print(np.array(a_lst, dtype=np.float32))
+    print(np.array(b_lst, dtype=np.float32))
+    print(prod_lst_ref)
+
+
+# Register the golden model tests, one per GOLDEN_MODEL (e.g., multiply_gr_test_numpy_001)
+for model in golden_models():
+    factory = TestFactory(multiply_gr_test)
+    factory.add_option('model', [model])
+    factory.generate_tests(postfix='_' + model)
+
+
+# stream_test, scoreboard_test and the sweep tests (see tb_common/arith_tests.py)
+register(globals(), 'unsigned_multiply', 'multiply', 'o_prod', signed=False, latency=LATENCY)
 
 
 if __name__ == "__main__":
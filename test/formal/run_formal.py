@@ -0,0 +1,336 @@
+# Author: Srinivasa Rao Zinka (srinivas . zinka [at] gmail . com)
+# Copyright (c) 2020 Srinivasa Rao Zinka
+# License: MIT License
+"""
+Parallel SymbiYosys runner for all the formal checks.
+
+Every task of every ``.sby`` file next to this script (``cvr``, ``bmc`` and
+``prf`` of the primitives, or the single task of a file without ``[tasks]``)
+is one job; the jobs run concurrently (``-j`` at a time, the number of usable
+CPUs by default), each one in its own directory under ``--out``. PASS/FAIL
+results are cached per (hash of the ``.sby`` file and its ``[files]``, task,
+mode, depth, ``FORMAL_TEST``), so an unchanged check is not solved again.
+
+The primitives select one property set with ``localparam FORMAL_TEST``; every
+value listed in their ``generate`` block is checked on its own (the source is
+read with ``-DFORMAL_TEST_SEL=<n>``), with the cover task only for the
+properties made of ``cover`` statements and the bmc/prove tasks only for the
+ones with ``assert`` statements. The summary then has one line per
+requirement (the comment above its ``FORMAL_TEST`` branch)::
+
+    python3 run_formal.py -j 4                           # everything
+    python3 run_formal.py signed_adder.sby --tasks prf   # a selection
+    python3 run_formal.py --force                        # ignore the cache
+    python3 run_formal.py --no-matrix                    # FORMAL_TEST as in the sources
+
+The cache lives in ``$DSP_BB_FORMAL_CACHE`` (``~/.cache/dsp_bb/formal.json`` by default).
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+FORMAL_DIR = os.path.dirname(os.path.realpath(__file__))
+CACHE_FILE = os.environ.get("DSP_BB_FORMAL_CACHE",
+                            os.path.join(os.path.expanduser("~"), ".cache", "dsp_bb", "formal.json"))
+
+
+def cpu_count():
+    """
+    Number of CPUs this process may run on
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def parse(sby):
+    """
+    Sections of a ``.sby`` file: {section name: list of (tasks, line)}, where
+    ``tasks`` is the set of tasks of a ``task: line`` prefix (empty for all tasks)
+    """
+    sections, section = {}, None
+    with open(sby) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            match = re.match(r"^\[(\w+)\]$", line)
+            if match:
+                section = sections.setdefault(match.group(1), [])
+                continue
+            tasks = set()
+            match = re.match(r"^([\w\s]+?)\s*:\s*(.*)$", line)
+            if match and section is not sections.get("files"):
+                tasks, line = set(match.group(1).split()), match.group(2)
+            if section is not None:
+                section.append((tasks, line))
+    return sections
+
+
+def formal_tests(path):
+    """
+    Property sets of a source file: list of (``FORMAL_TEST`` value, requirement,
+    set of the statements it uses, ``cover`` and/or ``assert``)
+    """
+    with open(path, errors="replace") as f:
+        text = f.read()
+    branch = re.compile(r"((?:^[ \t]*//[^\n]*\n)*)[ \t]*(?:else\s+)?if\s*\(\s*FORMAL_TEST\s*==\s*"
+                        r"(?:\d*'([bdh]))?([0-9a-fA-F_]+)\s*\)", re.M)
+    matches = list(branch.finditer(text))
+    tests = []
+    for i, match in enumerate(matches):
+        comments, base, digits = match.groups()
+        value = int(digits.replace("_", ""), {"b": 2, "h": 16}.get(base, 10))
+        end = matches[i + 1].start() if i + 1 < len(matches) else text.find("endgenerate", match.end())
+        body = text[match.end():end]
+        lines = [c.strip().lstrip("/").strip() for c in comments.splitlines()]
+        requirement = lines[-1] if lines else "FORMAL_TEST == %d" % value
+        kinds = {kind for kind in ("cover", "assert") if re.search(r"\b%s\s*\(" % kind, body)}
+        tests.append((value, requirement, kinds))
+    return tests
+
+
+def option(sections, task, name, default=None):
+    """
+    Value of option ``name`` for ``task`` (the last matching line wins)
+    """
+    value = default
+    for tasks, line in sections.get("options", []):
+        key, _, rest = line.partition(" ")
+        if key == name and (not tasks or task in tasks):
+            value = rest.strip()
+    return value
+
+
+class Job(object):
+    """
+    One task of one ``.sby`` file
+
+    :param sby: path of the ``.sby`` file
+    :param task: task name (None for a file without ``[tasks]``)
+    :param sections: :func:`parse` of ``sby``
+    :param test: ``FORMAL_TEST`` value (None to read the sources as they are)
+    :param requirement: description of the ``FORMAL_TEST`` property set
+    """
+    def __init__(self, sby, task, sections, test=None, requirement=None):
+        self.sby = os.path.realpath(sby)
+        self.task = task
+        self.test = test
+        self.requirement = requirement
+        self.mode = option(sections, task, "mode", "bmc")
+        self.depth = int(option(sections, task, "depth", 20))
+        base = os.path.dirname(self.sby)
+        self.files = [os.path.realpath(os.path.join(base, line.split()[-1]))
+                      for _, line in sections.get("files", [])]
+        self.stem = os.path.splitext(os.path.basename(sby))[0]
+        self.name = "%s_%s" % (self.stem, task) if task else self.stem
+        if test is not None:
+            self.name += "_t%d" % test
+
+    def key(self):
+        """
+        Cache key: (sources, task, mode, depth, FORMAL_TEST), or None if a source is missing
+        """
+        h = hashlib.sha256()
+        for path in [self.sby] + self.files:
+            if not os.path.isfile(path):
+                return None
+            with open(path, "rb") as f:
+                h.update(f.read())
+        h.update(("%s:%s:%d:%s" % (self.task, self.mode, self.depth, self.test)).encode())
+        return h.hexdigest()
+
+    def script(self, out_dir):
+        """
+        ``.sby`` file to run: the original one, or a copy in ``out_dir`` reading
+        the sources with ``-DFORMAL_TEST_SEL=<test>`` (and absolute ``[files]``)
+        """
+        if self.test is None:
+            return self.sby
+        lines, section = [], None
+        with open(self.sby) as f:
+            for line in f:
+                match = re.match(r"^\s*\[(\w+)\]", line)
+                if match:
+                    section = match.group(1)
+                elif section == "files" and line.strip() and not line.lstrip().startswith("#"):
+                    line = os.path.realpath(os.path.join(os.path.dirname(self.sby),
+                                                         line.split()[-1])) + "\n"
+                elif section == "script":
+                    line = re.sub(r"\bread\s+-formal\b",
+                                  "read -formal -DFORMAL_TEST_SEL=%d" % self.test, line)
+                lines.append(line)
+        path = os.path.join(out_dir, self.name + ".sby")
+        with open(path, "w") as f:
+            f.writelines(lines)
+        return path
+
+    def command(self, out_dir):
+        cmd = ["sby", "-f", "-d", os.path.join(out_dir, self.name), self.script(out_dir)]
+        return cmd + [self.task] if self.task else cmd
+
+
+def jobs(sby, tasks=None, matrix=True):
+    """
+    Jobs of a ``.sby`` file (only ``tasks`` if given), one per ``FORMAL_TEST``
+    value of its sources and task if ``matrix``
+    """
+    sections = parse(sby)
+    names = [line.split()[0] for _, line in sections.get("tasks", [])] or [None]
+    names = [t for t in names if not tasks or t in tasks]
+    plain = [Job(sby, t, sections) for t in names]
+    tests = []
+    if matrix:
+        for path in plain[0].files if plain else []:
+            if os.path.isfile(path):
+                tests += formal_tests(path)
+    if not tests:
+        return plain
+
+    found = []
+    for test, requirement, kinds in tests:
+        for job in plain:
+            # cover properties need the cover task, assertions the bmc/prove ones
+            needed = ({"cover"} if "cover" in kinds else set()) | \
+                     ({"bmc", "prove"} if "assert" in kinds else set())
+            if not needed or job.mode in needed:
+                found.append(Job(sby, job.task, sections, test, requirement))
+    return found
+
+
+def _solve_time(log):
+    """
+    (status, seconds) from the sby log file (None if not found)
+    """
+    status, seconds = None, None
+    if os.path.exists(log):
+        with open(log, errors="replace") as f:
+            for line in f:
+                match = re.search(r"Elapsed clock time \[H:MM:SS \(secs\)\]: \S+ \((\d+)\)", line)
+                if match:
+                    seconds = float(match.group(1))
+                match = re.search(r"DONE \((\w+)", line)
+                if match:
+                    status = match.group(1)
+    return status, seconds
+
+
+def run_one(job, out_dir, cache, force=False, lock=threading.Lock()):
+    """
+    Run (or look up) one job
+
+    :param job: :class:`Job`
+    :param out_dir: output directory, the job runs in ``<out_dir>/<job.name>``
+    :param cache: {key: [status, seconds]} (updated with PASS/FAIL results)
+    :param force: run even if the result is cached
+    :return: (job, status, solve time, wall time, cached)
+    """
+    key = job.key()
+    if key is None:
+        return job, "ERROR (missing source)", 0.0, 0.0, False
+    with lock:
+        hit = None if force else cache.get(key)
+    if hit:
+        return job, hit[0], hit[1], 0.0, True
+
+    workdir = os.path.join(out_dir, job.name)
+    start = time.time()
+    with open(os.path.join(out_dir, job.name + ".log"), "w") as f:
+        ret = subprocess.call(job.command(out_dir), cwd=os.path.dirname(job.sby),
+                              stdout=f, stderr=subprocess.STDOUT)
+    wall = time.time() - start
+
+    status, seconds = _solve_time(os.path.join(workdir, "logfile.txt"))
+    status = status or {0: "PASS", 2: "FAIL"}.get(ret, "ERROR")
+    seconds = wall if seconds is None else seconds
+    if status in ("PASS", "FAIL"):
+        with lock:
+            cache[key] = [status, seconds]
+    return job, status, seconds, wall, False
+
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".part", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".part", path)
+
+
+def summary(results, wall):
+    """
+    Print one line per job and the totals; returns the number of jobs not passed
+    """
+    print("%-36s %-6s %5s  %-24s %10s" % ("check", "mode", "depth", "result", "solve time"))
+    for job, status, seconds, _, cached in results:
+        print("%-36s %-6s %5d  %-24s %9.1fs" % (job.name, job.mode, job.depth,
+                                                 status + (" (cached)" if cached else ""), seconds))
+
+    # one line per FORMAL_TEST property set, over all its tasks
+    requirements = {}
+    for job, status, seconds, _, _ in results:
+        if job.test is not None:
+            entry = requirements.setdefault((job.stem, job.test), [job.requirement, [], 0.0])
+            entry[1].append(status)
+            entry[2] += seconds
+    if requirements:
+        print()
+        print("%-20s %4s  %-48s %-6s %10s" % ("source", "test", "requirement", "result", "solve time"))
+        for (stem, test), (requirement, statuses, seconds) in sorted(requirements.items()):
+            passed = all(s == "PASS" for s in statuses)
+            print("%-20s %4d  %-48s %-6s %9.1fs" % (stem, test, requirement[:48],
+                                                     "PASS" if passed else "FAIL", seconds))
+        print()
+
+    n_failed = sum(r[1] != "PASS" for r in results)
+    print("%d checks, %d not passed, %d cached in %.2f s wall time (%.2f s solving)"
+          % (len(results), n_failed, sum(r[4] for r in results), wall,
+             sum(r[2] for r in results if not r[4])))
+    return n_failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sby", nargs="*", help=".sby files to run (default: all)")
+    parser.add_argument("-t", "--tasks", nargs="+", help="only these tasks (e.g., prf)")
+    parser.add_argument("-j", "--jobs", type=int, default=cpu_count(),
+                        help="number of checks run at the same time (default: %(default)s)")
+    parser.add_argument("-o", "--out", default=os.path.join(FORMAL_DIR, "results"),
+                        help="output directory (default: %(default)s)")
+    parser.add_argument("-f", "--force", action="store_true", help="ignore cached results")
+    parser.add_argument("--no-matrix", action="store_true",
+                        help="check the FORMAL_TEST selected in the sources only")
+    args = parser.parse_args(argv)
+
+    files = args.sby or sorted(glob.glob(os.path.join(FORMAL_DIR, "*.sby")))
+    todo = [job for sby in files for job in jobs(sby, args.tasks, not args.no_matrix)]
+    os.makedirs(args.out, exist_ok=True)
+    cache = _load(CACHE_FILE)
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(lambda job: run_one(job, args.out, cache, args.force), todo))
+    wall = time.time() - start
+    _save(CACHE_FILE, cache)
+    return 1 if summary(results, wall) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
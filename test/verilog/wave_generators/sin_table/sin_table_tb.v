@@ -29,6 +29,8 @@ localparam period = 10; // clock period
 ***************************************************************************
 */
 
+integer dump_start, dump_cycles;
+
 initial
 begin
     $dumpfile("dump.vcd");
@@ -38,6 +40,19 @@ begin
     #(200000*period) $finish; // run for 20 clock cycles
 end
 
+// dump only a window of cycles, e.g., vvp sin_table_tb +dump_start=150000 +dump_cycles=200
+// (everything is dumped without +dump_start)
+initial
+begin
+    if ($value$plusargs("dump_start=%d", dump_start))
+    begin
+        if (!$value$plusargs("dump_cycles=%d", dump_cycles)) dump_cycles = 1000;
+        #0 $dumpoff;  // after $dumpvars
+        #(dump_start*period) $dumpon;
+        #(dump_cycles*period) $dumpoff;
+    end
+end
+
 /*
 ***************************************************************************
 * clock